@@ -0,0 +1,267 @@
+"""
+Data, filter and folder resolution hot paths against synthetic inventories.
+
+    python -m benchmarks.hot_paths [--sizes 1000 10000] [--repeat 5] [--storage json] [--output hot_paths.json]
+
+Everything runs in a temporary folder holding its own database, settings and image
+folder tree, removed afterwards; the real database is never touched. The window runs
+on the offscreen Qt platform. Results are written as JSON, one record per benchmark
+and size. --sizes 1000 10000 is a quick run, --sizes 1000 10000 100000 1000000 the full one.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# 1M devices take the better part of an hour and several GB, that size is asked for with --sizes
+DEFAULT_SIZES = SIZES[:-1]
+BRANDS = ["HP", "Lenovo", "Dell", "Fujitsu", "Surface"]
+TYPES = ["Mini", "SFF", "Tower", "Laptop"]
+WINDOWS_VERSIONS = ["Windows 10 Home", "Windows 10 Pro", "Windows 11 Home", "Windows 11 Pro"]
+SERIES = ["EliteDesk", "ProDesk", "ThinkCentre", "ThinkPad", "OptiPlex", "Latitude", "Esprimo", "Pro"]
+# Folders created per brand and root, the image share holds one folder per model, not per device
+FOLDERS_PER_BRAND = 2_000
+# What the filter benchmark types, one keystroke at a time
+QUERY = "hp elitedesk 8"
+# Lookups timed per round by the entry and folder benchmarks
+LOOKUPS = 200
+
+
+def generate_inventory(size, seed=0):
+    """brand -> list of entries, size entries in total with unique Brand, Model and Type."""
+    rng = random.Random(seed)
+    data = {brand: [] for brand in BRANDS}
+    for number in range(size):
+        brand = BRANDS[number % len(BRANDS)]
+        data[brand].append({
+            "Model": f"{rng.choice(SERIES)} {number // len(BRANDS)} G{rng.randint(1, 9)}",
+            "Type": rng.choice(TYPES),
+            "Windows Version": rng.choice(WINDOWS_VERSIONS),
+            "Image": rng.choice(["DONE", "NOT DONE"]),
+        })
+    return data
+
+
+def build_folder_tree(root, data):
+    """One folder per device for the first FOLDERS_PER_BRAND devices of each brand, in a mix of spellings."""
+    from helpers.folder_patterns import generate_folder_patterns
+
+    for brand, items in data.items():
+        brand_folder = os.path.join(root, brand)
+        os.makedirs(brand_folder, exist_ok=True)
+        for number, entry in enumerate(items[:FOLDERS_PER_BRAND]):
+            patterns = generate_folder_patterns(brand, entry["Model"], entry["Type"])
+            os.makedirs(os.path.join(brand_folder, patterns[number % len(patterns)]), exist_ok=True)
+
+
+def write_settings(settings_file, root, storage):
+    settings = {"Settings": {
+        "Brands": dict.fromkeys(BRANDS),
+        "Types": dict.fromkeys(TYPES),
+        "WindowsVersions": dict.fromkeys(WINDOWS_VERSIONS),
+        "Location": {root: None},
+        "Storage": {storage: None},
+        "PinUnlockSeconds": 0,
+    }}
+    os.makedirs(os.path.dirname(settings_file), exist_ok=True)
+    with open(settings_file, "w") as file:
+        json.dump(settings, file, indent=4)
+
+
+def measure(function, repeat, setup=None):
+    """Milliseconds of each of repeat calls of function, setup runs untimed before each one."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(name, size, timings, unit="call"):
+    return {
+        "name": name,
+        "size": size,
+        "unit": unit,
+        "rounds": len(timings),
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.mean(timings),
+        "max_ms": max(timings),
+    }
+
+
+def sample_lookups(data, rng):
+    """(brand, model, type) of LOOKUPS devices, a quarter of them not in the database."""
+    lookups = []
+    for number in range(LOOKUPS):
+        brand = rng.choice(BRANDS)
+        if number % 4 == 0 or not data[brand]:
+            lookups.append((brand, f"Missing {number}", rng.choice(TYPES)))
+        else:
+            entry = rng.choice(data[brand][:FOLDERS_PER_BRAND])
+            lookups.append((brand, entry["Model"], entry["Type"]))
+    return lookups
+
+
+def bench_storage(size, data, repeat):
+    from model import json_logic
+
+    results = [summarize("save_db", size, measure(lambda: json_logic.save_db(data), repeat))]
+    # Cold: parsed from disk. Cached: the file is unchanged, only the copy is paid for.
+    results.append(summarize("load_db cold", size, measure(json_logic.load_db, repeat, json_logic.invalidate_db_cache)))
+    json_logic.load_db()
+    results.append(summarize("load_db cached", size, measure(json_logic.load_db, repeat)))
+    return results
+
+
+def bench_window(size, window, repeat):
+    results = [summarize(
+        "load_data_GUI populate", size, measure(window.load_data_GUI, repeat, window.model.begin_streaming)
+    )]
+    # Reload with nothing changed, the diff leaves every row in place
+    results.append(summarize("load_data_GUI refresh", size, measure(window.load_data_GUI, repeat)))
+
+    proxy = window.proxy_model
+    timings = []
+    for _ in range(repeat):
+        proxy.setFilterString("")
+        for length in range(1, len(QUERY) + 1):
+            start = time.perf_counter()
+            proxy.setFilterString(QUERY[:length])
+            timings.append((time.perf_counter() - start) * 1000)
+    proxy.setFilterString("")
+    results.append(summarize("filter keystroke", size, timings, "keystroke"))
+    return results
+
+
+def bench_find_existing_entry(size, editor, lookups, repeat):
+    timings = []
+    for _ in range(repeat):
+        for brand, model, device_type in lookups:
+            form_data = {"Model": model, "Type": device_type}
+            start = time.perf_counter()
+            editor.find_existing_entry(brand, form_data)
+            timings.append((time.perf_counter() - start) * 1000)
+    return [summarize("find_existing_entry", size, timings, "lookup")]
+
+
+def bench_folders(size, root, lookups, repeat):
+    from helpers.folder_index import brand_folder_path, scan_folders
+    from helpers.folder_patterns import generate_folder_patterns, match_folder
+
+    # Probing the disk for every spelling, the way folders were found before the index
+    probe_timings = []
+    for _ in range(repeat):
+        for brand, model, device_type in lookups:
+            start = time.perf_counter()
+            brand_folder = brand_folder_path(root, brand)
+            for pattern in generate_folder_patterns(brand, model, device_type):
+                if os.path.isdir(os.path.join(brand_folder, pattern)):
+                    break
+            probe_timings.append((time.perf_counter() - start) * 1000)
+
+    # One scan per brand folder, then every lookup is answered from memory
+    scan_timings, indexes = [], {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        indexes = {brand: scan_folders(brand_folder_path(root, brand))[1] for brand in BRANDS}
+        scan_timings.append((time.perf_counter() - start) * 1000)
+    match_timings = []
+    for _ in range(repeat):
+        for brand, model, device_type in lookups:
+            start = time.perf_counter()
+            match_folder(indexes[brand], brand, model, device_type)
+            match_timings.append((time.perf_counter() - start) * 1000)
+
+    return [
+        summarize("folder pattern probe", size, probe_timings, "lookup"),
+        summarize("folder index scan", size, scan_timings, "scan of every brand"),
+        summarize("folder index match", size, match_timings, "lookup"),
+    ]
+
+
+def run(workspace, sizes, repeat, storage):
+    # json_logic takes its paths from the working folder when it is imported
+    os.chdir(workspace)
+    root = os.path.join(workspace, "images")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    write_settings(os.path.join(workspace, "helpers", "settings.json"), root, storage)
+
+    from PyQt5.QtWidgets import QApplication
+    from model import json_logic
+    from model.records import assign_ids
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    from plus import AddToDatabaseWindow
+    from show import DataViewApp
+
+    window = DataViewApp()
+    editor = AddToDatabaseWindow()
+    # Let the window's initial load of the empty database run before anything is timed
+    app.processEvents()
+    window.thread_pool.waitForDone()
+    app.processEvents()
+    results = []
+    print(f"{'benchmark':<26} {'size':>9} {'median ms':>11} {'max ms':>11}  per")
+    for size in sizes:
+        data = generate_inventory(size)
+        # With their record IDs already in place, so no load has to add and save them
+        assign_ids(data)
+        build_folder_tree(os.path.join(root, str(size)), data)
+        lookups = sample_lookups(data, random.Random(size))
+        # Replace the previous inventory, this first save is not timed
+        json_logic.save_db(data)
+        # Give the window's folder prefetch the folders of this size
+        write_settings(json_logic.settings_file, os.path.join(root, str(size)), storage)
+        window.settings.reload()
+
+        size_results = bench_storage(size, data, repeat)
+        size_results += bench_window(size, window, repeat)
+        size_results += bench_find_existing_entry(size, editor, lookups, repeat)
+        size_results += bench_folders(size, os.path.join(root, str(size)), lookups, repeat)
+        for result in size_results:
+            print(f"{result['name']:<26} {size:>9} {result['median_ms']:>11.3f} {result['max_ms']:>11.3f}  {result['unit']}")
+        results += size_results
+        # Let the folder prefetch finish before the next size changes the tree
+        window.get_folder_index().wait_for_scans()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="inventory sizes, devices in total")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--storage", choices=("json", "sqlite", "journal"), default="json")
+    parser.add_argument("--output", default="hot_paths.json", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    # The benchmark changes the working folder, the output goes where it was started from
+    output = os.path.abspath(args.output)
+    workspace = tempfile.mkdtemp(prefix="hot_paths_")
+    try:
+        results = run(workspace, args.sizes, args.repeat, args.storage)
+    finally:
+        os.chdir(os.path.dirname(output))
+        shutil.rmtree(workspace, ignore_errors=True)
+    with open(output, "w") as file:
+        json.dump({
+            "storage": args.storage,
+            "repeat": args.repeat,
+            "python": sys.version.split()[0],
+            "results": results,
+        }, file, indent=4)
+    print(f"Results written to '{output}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+PIN check latency against the scrypt cost.
+
+    python -m benchmarks.pin_verify [--repeat 5] [--output pin_verify.json]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from helpers.pin_request import SCRYPT_N, SCRYPT_P, SCRYPT_R, hash_pin, verify_pin
+
+
+COSTS = [2 ** exponent for exponent in range(10, 18)]
+
+
+def time_verify(n, repeat):
+    record = hash_pin("1234", n=n, r=SCRYPT_R, p=SCRYPT_P)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        verify_pin("0000", record)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"n": n, "median_ms": statistics.median(timings), "max_ms": max(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'n':>8} {'median ms':>10} {'max ms':>10}")
+    for n in COSTS:
+        result = time_verify(n, args.repeat)
+        results.append(result)
+        marker = "  <- current" if n == SCRYPT_N else ""
+        print(f"{n:>8} {result['median_ms']:>10.1f} {result['max_ms']:>10.1f}{marker}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"r": SCRYPT_R, "p": SCRYPT_P, "results": results}, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
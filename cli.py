@@ -0,0 +1,199 @@
+"""
+Command line access to the device database, no window needed.
+
+    python -m cli import devices.csv
+    python -m cli import devices.jsonl --keep-existing
+    python -m cli export --format csv --output devices.csv
+    python -m cli query --brand HP --where "Image=NOT DONE"
+
+Records are flat: a Brand field plus the entry fields (Model, Type, ...).
+Run it from the application folder, the database paths are relative to it.
+"""
+import argparse
+import csv
+import json
+import sys
+
+from model.json_logic import STORE_ERRORS, iter_db_entries, upsert_entries
+from model.records import ID_FIELD, normalize_value
+
+
+KEY_FIELDS = ("Brand", "Model", "Type")
+FORMATS = ("csv", "jsonl")
+
+
+def guess_format(path, requested):
+    if requested:
+        return requested
+    return "csv" if path and path.lower().endswith(".csv") else "jsonl"
+
+
+def read_records(file, file_format):
+    """
+    Yield (line, record) from a CSV or JSON-lines file, one record at a time.
+    record is None for a line that isn't a JSON object.
+    """
+    if file_format == "csv":
+        for record in csv.DictReader(file):
+            # Empty cells mean "not given", they don't clear existing values
+            yield record, {field: value for field, value in record.items() if field and value}
+        return
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        yield line, record if isinstance(record, dict) else None
+
+
+def split_record(record):
+    """
+    Return (brand, entry) of a flat record, or None if a key field is missing.
+    Values are uppercased, the way the add form stores them.
+    """
+    entry = {field: str(value).upper() for field, value in record.items() if value is not None}
+    brand = entry.pop("Brand", "")
+    if not brand or not entry.get("Model") or not entry.get("Type"):
+        return None
+    return brand, entry
+
+
+def import_records(args):
+    file_format = guess_format(args.file, args.format)
+    records, invalid = [], 0
+    with open(args.file, "r", newline="", encoding="utf-8") as file:
+        for line, record in read_records(file, file_format):
+            if record is None:
+                invalid += 1
+                print(f"WARNING: Skipping line that isn't a JSON object: {line}", file=sys.stderr)
+                continue
+            split = split_record(record)
+            if split is None:
+                invalid += 1
+                print(f"WARNING: Skipping record without Brand, Model or Type: {line}", file=sys.stderr)
+                continue
+            records.append(split)
+
+    # One load and one save for the whole file
+    summary = upsert_entries(records, overwrite=not args.keep_existing)
+    if summary is None:
+        print("Error: Unable to save the database, nothing was imported.", file=sys.stderr)
+        return 1
+    for brand, model, device_type in summary["conflicts"]:
+        print(f"WARNING: Already in the database, left unchanged: {brand} {model} {device_type}", file=sys.stderr)
+    print(f"Imported {len(records)} records: {len(summary['inserted'])} inserted, "
+          f"{len(summary['updated'])} updated, {len(summary['conflicts'])} conflicts, {invalid} invalid.")
+
+
+def matches(brand, entry, args):
+    """Values are compared like import matches devices, regardless of case or surrounding spaces."""
+    if args.brand and normalize_value(brand) != normalize_value(args.brand):
+        return False
+    if args.model and normalize_value(entry.get("Model", "")) != normalize_value(args.model):
+        return False
+    if args.type and normalize_value(entry.get("Type", "")) != normalize_value(args.type):
+        return False
+    for condition in args.where:
+        field, _, value = condition.partition("=")
+        value_now = brand if field == "Brand" else entry.get(field, "")
+        if normalize_value(value_now) != normalize_value(value):
+            return False
+    if args.contains:
+        text = args.contains.lower()
+        if text not in " ".join([brand, *map(str, entry.values())]).lower():
+            return False
+    return True
+
+
+def flat_records(entries):
+    # Record IDs are internal, imports hand out their own
+    for brand, entry, _ in entries:
+        yield {"Brand": brand, **{field: value for field, value in entry.items() if field != ID_FIELD}}
+
+
+def write_records(records, file, file_format):
+    """Write records as they come. CSV columns are the key fields plus whatever else shows up."""
+    count = 0
+    if file_format == "csv":
+        records = list(records)
+        fields = list(KEY_FIELDS)
+        for record in records:
+            fields.extend(field for field in record if field not in fields)
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+        return count
+    for record in records:
+        file.write(json.dumps(record) + "\n")
+        count += 1
+    return count
+
+
+def export_records(args, entries):
+    file_format = guess_format(args.output, args.format)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as file:
+            count = write_records(flat_records(entries), file, file_format)
+        print(f"Exported {count} records to '{args.output}'.", file=sys.stderr)
+    else:
+        write_records(flat_records(entries), sys.stdout, file_format)
+
+
+def query_records(args):
+    entries = (item for item in iter_db_entries() if matches(item[0], item[1], args))
+    export_records(args, entries)
+
+
+def add_output_arguments(parser):
+    parser.add_argument("--format", choices=FORMATS, help="output format, from the file extension by default")
+    parser.add_argument("--output", help="file to write, standard output by default")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Import, export and query the device database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="add or update devices from a CSV or JSON-lines file")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--format", choices=FORMATS, help="input format, from the file extension by default")
+    import_parser.add_argument("--keep-existing", action="store_true",
+                               help="only add new devices, leave existing ones unchanged")
+    import_parser.set_defaults(handler=import_records)
+
+    export_parser = commands.add_parser("export", help="write every device")
+    add_output_arguments(export_parser)
+    export_parser.set_defaults(handler=lambda args: export_records(args, iter_db_entries()))
+
+    query_parser = commands.add_parser("query", help="write the devices matching every given filter")
+    query_parser.add_argument("--brand")
+    query_parser.add_argument("--model")
+    query_parser.add_argument("--type")
+    query_parser.add_argument("--where", action="append", default=[], metavar="FIELD=VALUE",
+                              help="exact field value, can be repeated")
+    query_parser.add_argument("--contains", help="text found in any field, ignoring case")
+    add_output_arguments(query_parser)
+    query_parser.set_defaults(handler=query_records)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    status = 0
+    try:
+        status = args.handler(args)
+    except BrokenPipeError:
+        # Output piped into something like head that stopped reading
+        sys.stderr.close()
+    except (*STORE_ERRORS, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return status or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
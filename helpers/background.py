@@ -0,0 +1,63 @@
+import random
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QPalette, QBrush, QPixmap, QColor
+
+
+# Scaled backgrounds are cached per window size rounded up to this many pixels
+SIZE_BUCKET = 64
+# Scaled pixmaps kept in memory, the oldest is dropped first
+MAX_SCALED_PIXMAPS = 16
+
+# Decoded images, one per path for the whole process
+_pixmaps = {}
+# (path, bucket width, bucket height) -> smooth scaled pixmap
+_scaled_pixmaps = {}
+
+
+def random_background_path():
+    return f"assets/image/background-{random.randint(1, 4)}.png"
+
+
+def load_pixmap(image_path):
+    """Decode the image the first time it is asked for, then serve it from memory."""
+    pixmap = _pixmaps.get(image_path)
+    if pixmap is None:
+        pixmap = _pixmaps[image_path] = QPixmap(image_path)
+    return pixmap
+
+
+def scaled_background(image_path, size, fast=False):
+    """
+    Return the image scaled to cover size.
+    Smooth results are cached by size bucket; fast=True gives a cheap, uncached preview.
+    """
+    pixmap = load_pixmap(image_path)
+    if pixmap.isNull():
+        return pixmap
+    if fast:
+        return pixmap.scaled(size, Qt.KeepAspectRatioByExpanding, Qt.FastTransformation)
+
+    width = -(-max(size.width(), 1) // SIZE_BUCKET) * SIZE_BUCKET
+    height = -(-max(size.height(), 1) // SIZE_BUCKET) * SIZE_BUCKET
+    key = (image_path, width, height)
+    scaled = _scaled_pixmaps.get(key)
+    if scaled is None:
+        scaled = pixmap.scaled(QSize(width, height), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+        if len(_scaled_pixmaps) >= MAX_SCALED_PIXMAPS:
+            del _scaled_pixmaps[next(iter(_scaled_pixmaps))]
+        _scaled_pixmaps[key] = scaled
+    return scaled
+
+
+def apply_background(widget, image_path, fast=False):
+    """Paint the widget background with the image, or a random colour if it can't be loaded."""
+    palette = QPalette()
+    pixmap = scaled_background(image_path, widget.size(), fast)
+
+    if pixmap.isNull():
+        random_color = QColor(*(random.randint(0, 255) for _ in range(3)))
+        palette.setColor(QPalette.Background, random_color)
+    else:
+        palette.setBrush(QPalette.Background, QBrush(pixmap))
+
+    widget.setPalette(palette)
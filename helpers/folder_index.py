@@ -0,0 +1,440 @@
+import os
+from collections import deque
+from PyQt5.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QFileSystemWatcher, QTimer, pyqtSignal
+
+from helpers.folder_patterns import build_folder_index, match_folder
+
+
+# Worker threads for scans and folder matching. A root never has more than
+# FOLDER_SCANS_PER_ROOT scans running, so a dead share can't take the whole pool
+# and the other roots carry on, while the brand folders of one root are still
+# listed side by side.
+FOLDER_SCAN_THREADS = 8
+FOLDER_SCANS_PER_ROOT = 4
+# How long a double-click waits for one location root before skipping it,
+# and how long a folder check waits for a root to show any progress
+FOLDER_TIMEOUT_MS = 2000
+# A scan tells it is still listing once per this many entries read
+SCAN_PROGRESS_ENTRIES = 500
+
+# Outcome of a root in a FolderLookup, other than the matching folder path
+ROOT_PENDING = "pending"
+ROOT_MISSING = "missing"
+ROOT_NO_MATCH = "no match"
+ROOT_TIMED_OUT = "timed out"
+
+
+def scan_folders(brand_folder, known=None, progress=None):
+    """
+    List the sub folders of brand_folder as a normalized name index (see build_folder_index).
+    Returns (mtime, folders), or None if the folder can't be read.
+    known is a previous (mtime, folders) result, returned as is while the mtime is unchanged.
+    progress(brand_folder) is called every SCAN_PROGRESS_ENTRIES entries of a long listing.
+    """
+    try:
+        mtime = os.stat(brand_folder).st_mtime_ns
+        if known is not None and known[0] == mtime:
+            return known
+        names = []
+        # scandir reports the entry type from the listing itself, no stat per entry
+        with os.scandir(brand_folder) as entries:
+            for count, entry in enumerate(entries, 1):
+                if entry.is_dir():
+                    names.append(entry.name)
+                if progress is not None and count % SCAN_PROGRESS_ENTRIES == 0:
+                    progress(brand_folder)
+    except OSError:
+        return None
+    return mtime, build_folder_index(names)
+
+
+def brand_folder_path(root, brand):
+    return os.path.normpath(os.path.join(root, brand.strip()))
+
+
+class FolderScanTask(QRunnable):
+    """Scans one brand folder on a worker thread"""
+    def __init__(self, brand_folder, known, scanned_signal, missing_signal, progress_signal):
+        super().__init__()
+        self.brand_folder = brand_folder
+        self.known = known
+        self.scanned_signal = scanned_signal
+        self.missing_signal = missing_signal
+        self.progress_signal = progress_signal
+
+    def run(self):
+        result = scan_folders(self.brand_folder, self.known, self.progress_signal.emit)
+        if result is None:
+            self.missing_signal.emit(self.brand_folder)
+        else:
+            self.scanned_signal.emit(self.brand_folder, *result)
+
+
+class FolderMatchTask(QRunnable):
+    """
+    Matches the devices of one brand against already scanned folders, roots in priority order.
+    A device found nowhere is "" (missing), or None (unreachable) when a root didn't answer.
+    """
+    def __init__(self, brand, indexes, devices, resolved_signal, unreachable=False):
+        super().__init__()
+        self.brand = brand
+        # [(brand folder, folder index)]
+        self.indexes = indexes
+        self.devices = devices
+        self.resolved_signal = resolved_signal
+        self.unreachable = unreachable
+
+    def run(self):
+        statuses = {}
+        for model, device_type in self.devices:
+            statuses[(self.brand, model, device_type)] = None if self.unreachable else ""
+            for brand_folder, folders in self.indexes:
+                name = match_folder(folders, self.brand.strip(), model.strip(), device_type.strip())
+                if name:
+                    statuses[(self.brand, model, device_type)] = os.path.join(brand_folder, name)
+                    break
+        self.resolved_signal.emit(statuses)
+
+
+class FolderLookup(QObject):
+    """
+    Search for one device folder under every location root at once.
+    Each root is probed on the folder index pool; one that doesn't answer within the
+    timeout is skipped, so a slow or unplugged share can't hold up the others.
+    finished(path, outcomes) gives the match of the highest priority root ("" if none)
+    and each root's outcome, as soon as no better root can still answer.
+    """
+    finished = pyqtSignal(str, object)
+
+    def __init__(self, folder_index, roots, brand, model, device_type, timeout_ms=FOLDER_TIMEOUT_MS):
+        super().__init__(folder_index)
+        self.folder_index = folder_index
+        self.roots = list(roots)
+        self.brand_folders = [brand_folder_path(root, brand) for root in self.roots]
+        self.device = (brand.strip(), model.strip(), device_type.strip())
+        self.outcomes = [ROOT_PENDING] * len(self.roots)
+        self.done = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(timeout_ms)
+        self.timer.timeout.connect(self.timed_out)
+
+    def start(self):
+        """Connect to finished before starting, cached roots can answer right away."""
+        self.folder_index.folder_scanned.connect(self.scanned)
+        self.folder_index.folder_missing.connect(self.missing)
+        self.timer.start()
+        for brand_folder in self.brand_folders:
+            folders = self.folder_index.cached(brand_folder)
+            if folders is None:
+                # Ahead of any prefetch still waiting for the same root
+                self.folder_index.scan(brand_folder, urgent=True)
+            else:
+                self.answer(brand_folder, folders)
+        self.check()
+
+    def answer(self, brand_folder, folders):
+        for position, path in enumerate(self.brand_folders):
+            if path != brand_folder or self.outcomes[position] != ROOT_PENDING:
+                continue
+            if folders is None:
+                self.outcomes[position] = ROOT_MISSING
+            else:
+                name = match_folder(folders, *self.device)
+                self.outcomes[position] = os.path.join(brand_folder, name) if name else ROOT_NO_MATCH
+
+    def scanned(self, brand_folder, mtime, folders):
+        self.answer(brand_folder, folders)
+        self.check()
+
+    def missing(self, brand_folder):
+        self.answer(brand_folder, None)
+        self.check()
+
+    def timed_out(self):
+        self.outcomes = [ROOT_TIMED_OUT if outcome == ROOT_PENDING else outcome for outcome in self.outcomes]
+        self.check()
+
+    def check(self):
+        """Finish once the best root that found something, or every root, has answered."""
+        if self.done:
+            return
+        for outcome in self.outcomes:
+            if outcome == ROOT_PENDING:
+                return
+            if outcome not in (ROOT_MISSING, ROOT_NO_MATCH, ROOT_TIMED_OUT):
+                self.finish(outcome)
+                return
+        self.finish("")
+
+    def finish(self, path):
+        self.done = True
+        self.timer.stop()
+        self.folder_index.folder_scanned.disconnect(self.scanned)
+        self.folder_index.folder_missing.disconnect(self.missing)
+        self.finished.emit(path, dict(zip(self.roots, self.outcomes)))
+        self.deleteLater()
+
+
+class FolderResolve(QObject):
+    """
+    Resolve the folder of many devices under every location root.
+    Brand folders are scanned through the folder index. A root that shows no progress
+    for the timeout, no answer and no entries read, is reported unreachable; its scans
+    keep running and whatever they find later is still applied. Each brand is matched
+    on the folder index pool as soon as all of its folders are in or unreachable, and
+    again when an unreachable one answers, reported through folders_resolved.
+    """
+    def __init__(self, folder_index, roots, devices, timeout_ms=FOLDER_TIMEOUT_MS):
+        super().__init__(folder_index)
+        self.folder_index = folder_index
+        # Brand -> (Model, Type) pairs
+        self.devices = {brand: list(brand_devices) for brand, brand_devices in devices.items()}
+        # Brand -> its brand folders in root priority order
+        self.brand_folders = {
+            brand: [brand_folder_path(root, brand) for root in roots] for brand in self.devices
+        }
+        # Brands with a folder still to answer
+        self.pending = set(self.devices)
+        # Brand folder -> folder index, or None when missing
+        self.answers = {}
+        # Brand folders without an answer yet, and those of them whose root timed out
+        self.waiting = {brand_folder for brand_folders in self.brand_folders.values() for brand_folder in brand_folders}
+        self.unreachable = set()
+        self.timers = {}
+        for root in roots:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.setInterval(timeout_ms)
+            timer.timeout.connect(lambda root=root: self.timed_out(root))
+            self.timers[os.path.normpath(root)] = timer
+
+    def start(self):
+        self.folder_index.folder_scanned.connect(self.scanned)
+        self.folder_index.folder_missing.connect(self.missing)
+        self.folder_index.scan_progress.connect(self.progress)
+        for brand_folder in list(self.waiting):
+            folders = self.folder_index.cached(brand_folder)
+            if folders is None:
+                self.folder_index.scan(brand_folder)
+            else:
+                self.waiting.discard(brand_folder)
+                self.answers[brand_folder] = folders
+        for root, timer in self.timers.items():
+            if self.root_waiting(root):
+                timer.start()
+        self.check(set(self.pending))
+
+    def root_waiting(self, root):
+        """Whether a brand folder of root is still being waited for, not yet timed out."""
+        return any(os.path.dirname(brand_folder) == root for brand_folder in self.waiting - self.unreachable)
+
+    def answer(self, brand_folder, folders):
+        if brand_folder not in self.waiting:
+            return
+        self.waiting.discard(brand_folder)
+        self.unreachable.discard(brand_folder)
+        self.answers[brand_folder] = folders
+        self.progress(brand_folder)
+        self.check({brand for brand, brand_folders in self.brand_folders.items() if brand_folder in brand_folders})
+
+    def scanned(self, brand_folder, mtime, folders):
+        self.answer(brand_folder, folders)
+
+    def missing(self, brand_folder):
+        self.answer(brand_folder, None)
+
+    def progress(self, brand_folder):
+        """The root of brand_folder is still answering, give it the full timeout again."""
+        root = os.path.dirname(brand_folder)
+        timer = self.timers.get(root)
+        if timer is None:
+            return
+        if self.root_waiting(root):
+            timer.start()
+        else:
+            timer.stop()
+
+    def timed_out(self, root):
+        root = os.path.normpath(root)
+        self.unreachable.update(
+            brand_folder for brand_folder in self.waiting if os.path.dirname(brand_folder) == root
+        )
+        self.check({
+            brand for brand, brand_folders in self.brand_folders.items()
+            if any(os.path.dirname(brand_folder) == root for brand_folder in brand_folders)
+        })
+
+    def check(self, brands):
+        """Match each of brands whose folders are all answered or unreachable."""
+        for brand in brands & self.pending:
+            brand_folders = self.brand_folders[brand]
+            if any(brand_folder in self.waiting and brand_folder not in self.unreachable
+                   for brand_folder in brand_folders):
+                continue
+            indexes = [
+                (brand_folder, self.answers[brand_folder]) for brand_folder in brand_folders
+                if self.answers.get(brand_folder) is not None
+            ]
+            unreachable = any(brand_folder in self.unreachable for brand_folder in brand_folders)
+            self.folder_index.thread_pool.start(FolderMatchTask(
+                brand, indexes, self.devices[brand], self.folder_index.folders_resolved, unreachable
+            ))
+            if not unreachable:
+                self.pending.discard(brand)
+        if not self.pending:
+            self.finish()
+
+    def finish(self):
+        """Stop listening, also called when a newer folder check takes over."""
+        for timer in self.timers.values():
+            timer.stop()
+        self.folder_index.folder_scanned.disconnect(self.scanned)
+        self.folder_index.folder_missing.disconnect(self.missing)
+        self.folder_index.scan_progress.disconnect(self.progress)
+        if self.folder_index._resolve is self:
+            self.folder_index._resolve = None
+        self.deleteLater()
+
+
+class FolderIndex(QObject):
+    """
+    Cache of the normalized folder name index of each brand folder, under every location root.
+    Folders are indexed on background threads. A QFileSystemWatcher drops an entry
+    when its directory changes; folders the watcher can't follow are scanned again
+    whenever they are needed.
+    """
+    # Emitted on the UI thread once the cache is updated, anyone connected before then hears about it
+    folder_scanned = pyqtSignal(str, object, object)
+    folder_missing = pyqtSignal(str)
+    # Results straight from the scan tasks, for store and scan_failed only
+    scan_result = pyqtSignal(str, object, object)
+    scan_error = pyqtSignal(str)
+    # A long scan of the brand folder is still reading entries
+    scan_progress = pyqtSignal(str)
+    # (Brand, Model, Type) -> folder path, "" when missing or None when unreachable, per brand
+    folders_resolved = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # brand folder -> (mtime, folders), only touched on the UI thread
+        self._folders = {}
+        # Folders the watcher accepted, their cache entries are known to be current
+        self._watched = set()
+        # Scans running or waiting, a folder is only ever scanned once at a time
+        self._scanning = set()
+        # Root -> scans running under it, and root -> brand folders waiting for a free slot
+        self._busy_roots = {}
+        self._queued = {}
+        # The folder check still waiting for roots, replaced by the next one
+        self._resolve = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.invalidate)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(FOLDER_SCAN_THREADS)
+        self.scan_result.connect(self.store)
+        self.scan_error.connect(self.scan_failed)
+
+    def cached(self, brand_folder):
+        """The folder index of brand_folder if it is cached and being watched, otherwise None."""
+        if brand_folder in self._watched:
+            cached = self._folders.get(brand_folder)
+            return cached and cached[1]
+        return None
+
+    def scan(self, brand_folder, urgent=False):
+        """
+        Index brand_folder in the background, the result comes through folder_scanned or folder_missing.
+        At most FOLDER_SCANS_PER_ROOT scans of one root run at a time, an urgent one goes first in line.
+        """
+        root = os.path.dirname(brand_folder)
+        queue = self._queued.setdefault(root, deque())
+        if brand_folder in self._scanning:
+            if urgent and brand_folder in queue:
+                queue.remove(brand_folder)
+                queue.appendleft(brand_folder)
+            return
+        self._scanning.add(brand_folder)
+        if urgent:
+            queue.appendleft(brand_folder)
+        else:
+            queue.append(brand_folder)
+        self.start_next_scan(root)
+
+    def start_next_scan(self, root):
+        queue = self._queued.get(root)
+        while queue and self._busy_roots.get(root, 0) < FOLDER_SCANS_PER_ROOT:
+            brand_folder = queue.popleft()
+            self._busy_roots[root] = self._busy_roots.get(root, 0) + 1
+            # An entry the watcher doesn't follow is still reused while its mtime is unchanged,
+            # checked on the worker so a slow share can't block the UI thread
+            known = None if brand_folder in self._watched else self._folders.get(brand_folder)
+            self.thread_pool.start(FolderScanTask(
+                brand_folder, known, self.scan_result, self.scan_error, self.scan_progress
+            ))
+        if not queue:
+            self._queued.pop(root, None)
+
+    def scan_done(self, brand_folder):
+        self._scanning.discard(brand_folder)
+        root = os.path.dirname(brand_folder)
+        running = self._busy_roots.pop(root, 1) - 1
+        if running:
+            self._busy_roots[root] = running
+        self.start_next_scan(root)
+
+    def wait_for_scans(self):
+        """
+        Block until every running and queued scan is stored, processing events meanwhile.
+        Queued scans are only started from the UI thread, waiting on the pool alone would miss them.
+        """
+        while self._queued or self._busy_roots:
+            self.thread_pool.waitForDone(10)
+            QCoreApplication.processEvents()
+        # Folder matching started by the last results
+        self.thread_pool.waitForDone()
+        QCoreApplication.processEvents()
+
+    def prefetch(self, brand_folders):
+        """Index the given folders in the background so later lookups are memory hits."""
+        for brand_folder in brand_folders:
+            brand_folder = os.path.normpath(brand_folder)
+            if brand_folder not in self._folders:
+                self.scan(brand_folder)
+
+    def locate(self, roots, brand, model, device_type, callback, timeout_ms=FOLDER_TIMEOUT_MS):
+        """Search every root for the device folder, callback(path, outcomes) gets the result."""
+        lookup = FolderLookup(self, roots, brand, model, device_type, timeout_ms)
+        lookup.finished.connect(callback)
+        lookup.start()
+
+    def resolve_all(self, roots, devices, timeout_ms=FOLDER_TIMEOUT_MS):
+        """
+        Resolve the folder of every device. Brand folders are scanned side by side,
+        up to FOLDER_SCANS_PER_ROOT per root, and brands matched concurrently.
+        devices maps Brand -> (Model, Type) pairs, results arrive through folders_resolved.
+        """
+        if self._resolve is not None:
+            self._resolve.finish()
+        self._resolve = FolderResolve(self, roots, devices, timeout_ms)
+        self._resolve.start()
+
+    def store(self, brand_folder, mtime, folders):
+        self._folders[brand_folder] = (mtime, folders)
+        if brand_folder not in self._watched and self.watcher.addPath(brand_folder):
+            self._watched.add(brand_folder)
+        self.scan_done(brand_folder)
+        self.folder_scanned.emit(brand_folder, mtime, folders)
+
+    def scan_failed(self, brand_folder):
+        self.invalidate(brand_folder)
+        self.scan_done(brand_folder)
+        self.folder_missing.emit(brand_folder)
+
+    def invalidate(self, brand_folder):
+        brand_folder = os.path.normpath(brand_folder)
+        self._folders.pop(brand_folder, None)
+        # A removed folder is no longer watched
+        if brand_folder in self._watched and not os.path.isdir(brand_folder):
+            self.watcher.removePath(brand_folder)
+            self._watched.discard(brand_folder)
@@ -18,7 +18,6 @@ def generate_folder_patterns(brand, model, device_type):
         f"{model} {device_type}",
         f"{model}_{device_type}",
         f"{model}{device_type}",
-        f"{model}{device_type}",
         f"{model}"
     ]
 
@@ -47,3 +46,48 @@ def generate_folder_patterns(brand, model, device_type):
         folder_patterns.append(f"#{pattern}_")
 
     return folder_patterns
+
+def normalize_folder_name(name):
+    '''
+    Canonical form of a folder name: lowercase without '#', '_' or spaces,
+    so "#HP_840 G3 Laptop_" and "hp 840g3 laptop" compare equal.
+    '''
+    return name.lower().replace("#", "").replace("_", "").replace(" ", "")
+
+def folder_keys(brand, model, device_type):
+    '''
+    Normalized names a device folder can have, in pattern priority order:
+    brand+model+type, brand+model, model+type, model.
+    '''
+    return [
+        normalize_folder_name(f"{brand}{model}{device_type}"),
+        normalize_folder_name(f"{brand}{model}"),
+        normalize_folder_name(f"{model}{device_type}"),
+        normalize_folder_name(model),
+    ]
+
+def build_folder_index(folder_names):
+    '''
+    Normalized name -> [folder without '#', folder with '#'] for a brand folder listing.
+    Built once per listing, every device of the brand is then resolved with dictionary lookups.
+    '''
+    index = {}
+    for name in sorted(folder_names):
+        slots = index.setdefault(normalize_folder_name(name), [None, None])
+        slot = 1 if name.startswith("#") else 0
+        if slots[slot] is None:
+            slots[slot] = name
+    return index
+
+def match_folder(folder_index, brand, model, device_type):
+    '''
+    Return the real name of the device folder, or None.
+    Same priority as the pattern list: any folder without '#' before a '#' one,
+    then brand+model+type, brand+model, model+type and model alone.
+    '''
+    candidates = [folder_index.get(key) for key in folder_keys(brand, model, device_type)]
+    for slot in (0, 1):
+        for slots in candidates:
+            if slots and slots[slot]:
+                return slots[slot]
+    return None
@@ -1,9 +1,11 @@
 import hashlib
+import hmac
+import json
 import os
-from cryptography.fernet import Fernet
+import time
 from PyQt5.QtWidgets import QApplication, QDialog, QVBoxLayout, QLabel, QLineEdit
 from PyQt5.QtGui import QIcon, QFont
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
 
 
 # File paths
@@ -11,6 +13,14 @@ PLAIN_PIN_FILE = os.path.join(os.getcwd(), "database/pin.txt")
 SECURE_PIN_FILE = os.path.join(os.getcwd(), "database/secure_pin.bin")
 HASH_FILE = os.path.join(os.getcwd(), "database/pin_hash.txt")
 
+# scrypt cost of new PIN hashes, stored with each hash so existing ones keep verifying.
+# Doubling SCRYPT_N roughly doubles the time (and memory) of one check.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+HASH_BYTES = 32
+
 
 # Generate file hash for validation
 def generate_file_hash(filepath):
@@ -24,42 +34,68 @@ def generate_file_hash(filepath):
     return hasher.hexdigest()
 
 
-# Save the encrypted PIN securely and protect the file
-def save_encrypted_pin():
-    if not os.path.exists(PLAIN_PIN_FILE):
-        raise FileNotFoundError("Application is misconfigured. Missing PIN file.")
-    
-    # Generate encryption key and encrypt the PIN
-    key = Fernet.generate_key()
-    fernet = Fernet(key)
+def derive_pin_hash(pin, salt, n, r, p):
+    # maxmem leaves room for the larger costs the benchmark tries
+    return hashlib.scrypt(pin.encode(), salt=salt, n=n, r=r, p=p, dklen=HASH_BYTES, maxmem=256 * n * r + 2 ** 20)
+
+
+def hash_pin(pin, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """Return a salted scrypt record of the PIN, the PIN itself is never stored."""
+    salt = os.urandom(SALT_BYTES)
+    return {
+        "kdf": "scrypt", "n": n, "r": r, "p": p,
+        "salt": salt.hex(), "hash": derive_pin_hash(pin, salt, n, r, p).hex(),
+    }
+
+
+def verify_pin(pin, record):
+    """Check a PIN against a record from hash_pin, in constant time."""
+    if record.get("kdf") != "scrypt":
+        raise ValueError(f"Unsupported PIN hash: {record.get('kdf')}")
+    expected = bytes.fromhex(record["hash"])
+    actual = derive_pin_hash(pin, bytes.fromhex(record["salt"]), record["n"], record["r"], record["p"])
+    return hmac.compare_digest(actual, expected)
 
-    with open(PLAIN_PIN_FILE, "r") as file:
-        plain_pin = file.read().strip()
 
-    encrypted_pin = fernet.encrypt(plain_pin.encode())
+def write_protected(filepath, content):
+    """Write a file and make it read-only, lifting the protection of a previous version first."""
+    if os.path.exists(filepath):
+        os.chmod(filepath, 0o600)
+        os.system(f"attrib -R {filepath}")
+    with open(filepath, "w") as file:
+        file.write(content)
+    os.chmod(filepath, 0o400)  # Read-only for owner
+    os.system(f"attrib +R {filepath}") # Read-only for owner
 
-    # Save the encrypted PIN and key
-    with open(SECURE_PIN_FILE, "wb") as pin_file:
-        pin_file.write(key + b"\n" + encrypted_pin)
 
+# Save the PIN hash securely and protect the file
+def save_pin_hash(plain_pin):
+    write_protected(SECURE_PIN_FILE, json.dumps(hash_pin(plain_pin)))
     # Generate and save the file hash
-    file_hash = generate_file_hash(SECURE_PIN_FILE)
-    with open(HASH_FILE, "w") as hash_file:
-        hash_file.write(file_hash)
+    write_protected(HASH_FILE, generate_file_hash(SECURE_PIN_FILE))
 
-    # Make the file read-only
-    os.chmod(SECURE_PIN_FILE, 0o400)  # Read-only for owner
-    os.system(f"attrib +R {SECURE_PIN_FILE}") # Read-only for owner
-    os.chmod(HASH_FILE, 0o400) # Read-only for owner
-    os.system(f"attrib +R {HASH_FILE}") # Read-only for owner
-    # Delete the plaintext PIN file
-    os.remove(PLAIN_PIN_FILE)
+
+def read_plain_pin():
+    if not os.path.exists(PLAIN_PIN_FILE):
+        raise FileNotFoundError("Application is misconfigured. Missing PIN file.")
+    with open(PLAIN_PIN_FILE, "r") as file:
+        return file.read().strip()
 
 
-# Load the encrypted PIN and check for tampering
-def load_encrypted_pin():
+def read_fernet_pin(content):
+    """PIN of a secure file written by older versions: the Fernet key, a newline, the encrypted PIN."""
+    from cryptography.fernet import Fernet
+
+    key, encrypted_pin = content.split(b"\n", 1)
+    return Fernet(key).decrypt(encrypted_pin).decode()
+
+
+# Load the PIN hash and check for tampering
+def load_pin_hash():
     if not os.path.exists(SECURE_PIN_FILE) or not os.path.exists(HASH_FILE):
-        save_encrypted_pin()
+        save_pin_hash(read_plain_pin())
+        # Delete the plaintext PIN file
+        os.remove(PLAIN_PIN_FILE)
 
     # Validate file integrity
     expected_hash = open(HASH_FILE, "r").read().strip()
@@ -68,18 +104,91 @@ def load_encrypted_pin():
     if current_hash != expected_hash:
         raise PermissionError("PIN file tampering detected!")
 
-    # Load encrypted PIN
     with open(SECURE_PIN_FILE, "rb") as pin_file:
-        key, encrypted_pin = pin_file.read().split(b"\n", 1)
-        fernet = Fernet(key)
-        return fernet, encrypted_pin
+        content = pin_file.read()
+    try:
+        return json.loads(content)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # Encrypted PIN from an older version, replace it with a hash
+        save_pin_hash(read_fernet_pin(content))
+        print("DEBUG: Encrypted PIN replaced with a salted hash.")
+        return load_pin_hash()
+
+
+# PIN hash record, read the first time a PIN is checked
+_pin_material = None
+# time.monotonic() until which edits and deletes don't ask for the PIN again
+_unlocked_until = 0.0
+
+
+def pin_material():
+    """
+    Load the PIN hash on first use and keep it in memory.
+    Importing this module doesn't touch the PIN files or spawn any process.
+    """
+    global _pin_material
+    if _pin_material is None:
+        _pin_material = load_pin_hash()
+    return _pin_material
+
+
+def unlock(seconds):
+    global _unlocked_until
+    _unlocked_until = max(_unlocked_until, time.monotonic() + seconds)
+
+
+def is_unlocked():
+    return time.monotonic() < _unlocked_until
+
+
+def unlock_pin(unlock_seconds=0, parent=None):
+    """
+    Ask for the PIN unless it was entered in the last unlock_seconds.
+    Returns True when the action may go ahead.
+    """
+    if is_unlocked():
+        return True
+    dialog = PinDialog(parent, unlock_seconds)
+    accepted = dialog.exec_() == QDialog.Accepted
+    # Parented for placement only, not kept (with its thread pool) for the life of the parent
+    dialog.deleteLater()
+    return accepted
+
+
+class PinSignals(QObject):
+    # True or False, None when the PIN hash can't be loaded
+    verified = pyqtSignal(object)
+
+
+class PinVerifyTask(QRunnable):
+    """Runs the deliberately slow PIN hash off the UI thread"""
+    def __init__(self, pin, signals):
+        super().__init__()
+        self.pin = pin
+        self.signals = signals
+
+    def run(self):
+        try:
+            self.signals.verified.emit(verify_pin(self.pin, pin_material()))
+        except Exception as e:
+            # Missing or malformed PIN record, bad legacy token... an exception escaping
+            # run() would take the whole application down
+            print(f"ERROR: Unable to check the PIN. Details: {e}")
+            self.signals.verified.emit(None)
 
 
 class PinDialog(QDialog):
-    # Load and store the encrypted PIN in memory (one-time initialization)
-    FERNET, ENCRYPTED_PIN = load_encrypted_pin()
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, unlock_seconds=0):
         super().__init__(parent)
+        self.unlock_seconds = unlock_seconds
+        self.checking = False
+        # Closed without a valid PIN, a check still running then no longer counts
+        self.cancelled = False
+        # Own pool, one check at a time
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.signals = PinSignals(self)
+        self.signals.verified.connect(self.pin_checked)
         self.setWindowTitle("Enter PIN")
         self.setFixedSize(200, 75)
         self.setWindowIcon(QIcon("assets/icons/lock.svg"))
@@ -112,12 +221,30 @@ class PinDialog(QDialog):
         self.setLayout(layout)
     
     def check_pin(self):
-        # Decrypt the encrypted PIN and compare
-        decrypted_pin = self.FERNET.decrypt(self.ENCRYPTED_PIN).decode()
-        if self.pin_input.text() == decrypted_pin:
+        if self.checking:
+            return
+        self.checking = True
+        self.pin_input.setReadOnly(True)
+        self.label.setText("CHECKING...")
+        self.thread_pool.start(PinVerifyTask(self.pin_input.text(), self.signals))
+
+    def reject(self):
+        self.cancelled = True
+        super().reject()
+
+    def pin_checked(self, valid):
+        if self.cancelled:
+            return
+        self.checking = False
+        self.pin_input.setReadOnly(False)
+        if valid:
             print("Success")
+            unlock(self.unlock_seconds)
             self.accept()  # Close dialog on success
+        elif valid is None:
+            self.label.setText("PIN UNAVAILABLE.")
         else:
+            self.pin_input.clear()
             self.label.setText("INCORRECT PIN.")  # Display error message
 
 
@@ -0,0 +1,78 @@
+import json
+import os
+from PyQt5.QtCore import QObject, QFileSystemWatcher, pyqtSignal
+
+from model.json_logic import load_settings_data, pin_unlock_seconds, settings_file
+
+
+class SettingsService(QObject):
+    """
+    settings.json read once and kept in memory.
+    A QFileSystemWatcher reloads it when the file changes and settings_changed
+    tells open windows to refresh, so the accessors never touch the disk.
+    """
+    settings_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._data = load_settings_data()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.reload)
+        self.watch()
+
+    def watch(self):
+        # Editors often replace the file, which drops it from the watcher
+        if os.path.exists(settings_file) and settings_file not in self.watcher.files():
+            self.watcher.addPath(settings_file)
+
+    def reload(self, path=None):
+        self.watch()
+        try:
+            with open(settings_file, "r") as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            # Probably caught halfway through a save, keep the current settings until the next change
+            print(f"WARNING: Unable to reload the settings. Details: {e}")
+            return
+        if not isinstance(data, dict) or "Settings" not in data:
+            print("WARNING: Ignoring settings without a 'Settings' section.")
+            return
+        if data != self._data:
+            self._data = data
+            print("DEBUG: Settings reloaded.")
+            self.settings_changed.emit()
+
+    def keys(self, section):
+        return list(self._data["Settings"].get(section) or {})
+
+    def brands(self):
+        return self.keys("Brands")
+
+    def types(self):
+        return self.keys("Types")
+
+    def windows_versions(self):
+        return self.keys("WindowsVersions")
+
+    def locations(self):
+        """Image folder roots, in order of priority."""
+        return self.keys("Location")
+
+    def location(self):
+        """The main image folder root."""
+        locations = self.locations()
+        return locations[0] if locations else ""
+
+    def pin_unlock_seconds(self):
+        return pin_unlock_seconds(self._data)
+
+
+_settings_service = None
+
+
+def settings_service():
+    """The shared SettingsService, created on first use."""
+    global _settings_service
+    if _settings_service is None:
+        _settings_service = SettingsService()
+    return _settings_service
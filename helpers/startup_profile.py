@@ -0,0 +1,27 @@
+import time
+
+
+# Taken when show.py starts importing, the first thing it does
+_start = time.perf_counter()
+# (step, perf_counter) in the order they happened
+_marks = []
+_reported = False
+
+
+def mark_startup(step):
+    """Record the moment a startup step finished."""
+    _marks.append((step, time.perf_counter()))
+
+
+def report_startup():
+    """Print how long each startup step took, once, in the layout of python -X importtime."""
+    global _reported
+    if _reported:
+        return
+    _reported = True
+    print("DEBUG: startup profile")
+    print(f"{'step [us]':>12} | {'since start [us]':>16} | step")
+    previous = _start
+    for step, at in _marks:
+        print(f"{int((at - previous) * 1e6):>12} | {int((at - _start) * 1e6):>16} | {step}")
+        previous = at
@@ -0,0 +1,293 @@
+import json
+import os
+
+from model.records import (
+    ID_FIELD, brand_spelling, copy_database, find_record, merge_fields, merge_records, record_index, remove_records,
+    with_record_id
+)
+
+
+# Rewrite the snapshot once the log grows past this many bytes
+COMPACT_LOG_BYTES = 1024 * 1024
+# Operations apply_operation keeps the record index in step with, the others drop it
+INDEXED_OPERATIONS = ("upsert", "update_records", "delete_records")
+
+
+def common_bounds(old, new):
+    """Return the lengths of the common prefix and suffix of two lists."""
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def apply_operation(data, operation, index=None):
+    """
+    Apply one journal record to a brand -> list of entries database.
+    index, the record_index of data, is kept up to date for INDEXED_OPERATIONS.
+    """
+    op, brand = operation["op"], operation.get("brand")
+    if op == "splice":
+        start = operation["start"]
+        data.setdefault(brand, [])[start:start + operation["delete"]] = operation["insert"]
+    elif op == "drop":
+        data.pop(brand, None)
+    elif op == "upsert":
+        entry = operation["entry"]
+        brand_data = data.setdefault(brand, [])
+        existing_entry = next(
+            (item for item in brand_data if
+             item.get("Model") == entry.get("Model") and
+             item.get("Type") == entry.get("Type")),
+            None
+        )
+        if existing_entry:
+            existing_entry.update(entry)
+        else:
+            brand_data.append(entry)
+            if index is not None:
+                index[entry.get(ID_FIELD)] = (brand, entry)
+    elif op == "update_records":
+        merge_records(data, {record_id: tuple(change) for record_id, change in operation["changes"].items()}, index)
+    elif op == "delete_records":
+        remove_records(data, operation["ids"], index)
+
+
+class JournalStore:
+    """
+    Snapshot plus append-only JSON-lines log.
+    Every change is appended to the log as a small record, so the cost of a write follows
+    the size of the change. Loading replays the log over the snapshot; once the log passes
+    COMPACT_LOG_BYTES the snapshot is rewritten atomically and the log starts over.
+    Another process (the command line, a second window) may append to the same log:
+    the state is read again whenever the files changed since this process last saw them.
+    """
+    def __init__(self, snapshot_path, log_path, compact_bytes=COMPACT_LOG_BYTES):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.compact_bytes = compact_bytes
+        # Last state written or read by this process, the base for diffs
+        self._state = None
+        # record_index of _state, built when first needed
+        self._index = None
+        self._seq = 0
+        # files_signature() as of _state, None until loaded
+        self._signature = None
+        # What load found wrong with the end of the log: an offset to truncate at, "newline", or None
+        self._repair = None
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+
+    def read_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return 0, {}
+        try:
+            with open(self.snapshot_path, "r") as file:
+                snapshot = json.load(file)
+            return snapshot["seq"], snapshot["data"]
+        except (json.JSONDecodeError, KeyError, IOError) as e:
+            print(f"Error: Unable to read the database snapshot. Details: {e}")
+            return 0, {}
+
+    def files_signature(self):
+        """(mtime, size, inode) of the snapshot and the log, None for a missing one."""
+        signature = []
+        for path in (self.snapshot_path, self.log_path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                signature.append(None)
+                continue
+            signature.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        return tuple(signature)
+
+    def load(self):
+        # Taken before reading, a write that lands meanwhile makes the next state() read again
+        signature = self.files_signature()
+        snapshot_seq, data = self.read_snapshot()
+        seq = snapshot_seq
+        self._repair = None
+        if os.path.exists(self.log_path):
+            # Read only, a read-only share must still load; the file is reopened if it needs a repair
+            with open(self.log_path, "rb") as file:
+                offset = 0
+                for line in file:
+                    try:
+                        operation = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write from a crash, nothing after it was acknowledged.
+                        # Cut it off so the next record starts on a clean line.
+                        self._repair = offset
+                        break
+                    offset += len(line)
+                    if not line.endswith(b"\n"):
+                        # Only the newline was lost, the record itself is whole: end its line
+                        # so the next append doesn't land on it
+                        self._repair = "newline"
+                    # Records already folded into the snapshot by an interrupted compaction
+                    if operation["seq"] <= snapshot_seq:
+                        continue
+                    apply_operation(data, operation)
+                    # Two processes appending at the same moment can log the same seq, both are kept
+                    seq = max(seq, operation["seq"])
+            try:
+                if self._repair is not None:
+                    self.repair_log()
+                    # The repair is this process' own write
+                    signature = self.files_signature()
+            except OSError as e:
+                # Can't write here, append repairs it first the next time it can
+                print(f"WARNING: Unable to repair the database log. Details: {e}")
+        self._seq = seq
+        self._state = data
+        self._index = None
+        self._signature = signature
+        return copy_database(data)
+
+    def repair_log(self):
+        """Truncate the torn record or end the unterminated line found by load."""
+        if self._repair is None:
+            return
+        if self._repair == "newline":
+            with open(self.log_path, "ab") as file:
+                file.write(b"\n")
+                file.flush()
+                os.fsync(file.fileno())
+        else:
+            with open(self.log_path, "rb+") as file:
+                file.truncate(self._repair)
+                file.flush()
+                os.fsync(file.fileno())
+        self._repair = None
+
+    def state(self):
+        """The current database, read again if another process changed the files."""
+        if self._state is None or self.files_signature() != self._signature:
+            self.load()
+        return self._state
+
+    def index(self):
+        """Record ID -> (brand, entry) of the current state, kept up to date by append."""
+        state = self.state()
+        if self._index is None:
+            self._index = record_index(state)
+        return self._index
+
+    def append(self, operations):
+        """
+        Durably append records to the log and apply them to the in-memory state.
+        The state is brought up to date first, so the records follow the last seq on disk.
+        """
+        if not operations:
+            return
+        state = self.state()
+        self.repair_log()
+        lines = []
+        for operation in operations:
+            self._seq += 1
+            operation["seq"] = self._seq
+            lines.append(json.dumps(operation, separators=(",", ":")) + "\n")
+            apply_operation(state, operation, self._index)
+            if operation["op"] not in INDEXED_OPERATIONS:
+                self._index = None
+        records = "".join(lines).encode()
+        with open(self.log_path, "ab") as file:
+            file.write(records)
+            file.flush()
+            os.fsync(file.fileno())
+        snapshot, log = self._signature
+        signature = self.files_signature()
+        # Anything else in the log since the state was read means another process wrote too,
+        # leave the signature behind so the next state() reads it all
+        if signature[0] == snapshot and signature[1] and signature[1][1] == (log[1] if log else 0) + len(records):
+            self._signature = signature
+        if os.path.getsize(self.log_path) > self.compact_bytes:
+            self.compact()
+
+    def save(self, data):
+        """Append only what differs from the current state, one splice per changed brand."""
+        state = self.state()
+        operations = [{"op": "drop", "brand": brand} for brand in state if brand not in data]
+        for brand, items in data.items():
+            current = state.get(brand)
+            if current is None:
+                operations.append({
+                    "op": "splice", "brand": brand, "start": 0, "delete": 0,
+                    "insert": [dict(entry) for entry in items],
+                })
+            elif current != items:
+                prefix, suffix = common_bounds(current, items)
+                operations.append({
+                    "op": "splice", "brand": brand, "start": prefix,
+                    "delete": len(current) - prefix - suffix,
+                    "insert": [dict(entry) for entry in items[prefix:len(items) - suffix]],
+                })
+        self.append(operations)
+
+    def find(self, brand, model, device_type, exclude_id=None):
+        found = find_record(self.state(), brand, model, device_type, exclude_id)
+        return dict(found[1]) if found else None
+
+    def upsert(self, brand, entry):
+        """Merge entry into the first record matching by entry_key, or add it. Returns True when one was updated."""
+        state = self.state()
+        found = find_record(state, brand, entry.get("Model", ""), entry.get("Type", ""))
+        if found:
+            # Logged with the record's own brand and spelling, replay matches those exactly
+            record_brand, existing = found
+            entry = {**merge_fields(entry), "Model": existing.get("Model"), "Type": existing.get("Type")}
+            self.append([{"op": "upsert", "brand": record_brand, "entry": entry}])
+            return True
+        # New entries get their ID here so replaying the log gives the same one
+        self.append([{"op": "upsert", "brand": brand_spelling(state, brand), "entry": with_record_id(entry)}])
+        return False
+
+    def update_records(self, changes):
+        """Apply {record ID: (brand or None, fields)} as one log record. Returns the number changed."""
+        index = self.index()
+        changes = {record_id: list(change) for record_id, change in changes.items() if record_id in index}
+        if changes:
+            self.append([{"op": "update_records", "changes": changes}])
+        return len(changes)
+
+    def delete_records(self, record_ids):
+        """Delete the records with the given IDs as one log record. Returns the number deleted."""
+        index = self.index()
+        record_ids = [record_id for record_id in set(record_ids) if record_id in index]
+        if record_ids:
+            self.append([{"op": "delete_records", "ids": record_ids}])
+        return len(record_ids)
+
+    def compact(self):
+        """Atomically rewrite the snapshot (temp file + rename), then start a new log."""
+        state = self.state()
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"seq": self._seq, "data": state}, file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # A crash before this point is harmless, replay skips records up to the snapshot seq
+        open(self.log_path, "w").close()
+        self._repair = None
+        self._signature = self.files_signature()
+
+    def migrate_from_json(self, json_path):
+        """Seed the snapshot from the plain JSON database the first time the journal is used."""
+        if os.path.exists(self.snapshot_path) or os.path.exists(self.log_path):
+            return False
+        data = {}
+        if os.path.exists(json_path):
+            try:
+                with open(json_path, "r") as file:
+                    data = json.load(file)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Error: Unable to migrate the JSON database. Details: {e}")
+                return False
+        # Taken as the current state of the (still missing) files, so compact doesn't read them instead
+        self._seq, self._state, self._index, self._signature = 0, data, None, self.files_signature()
+        self.compact()
+        return bool(data)
@@ -1,6 +1,17 @@
 
+import functools
 import json
 import os
+import re
+import sqlite3
+import threading
+
+from model.journal_store import JournalStore
+from model.records import (
+    ID_FIELD, assign_ids, brand_spelling, copy_database, entry_key, find_record, merge_fields, merge_records,
+    new_record_id, record_index, remove_records, with_record_id
+)
+from model.sqlite_store import SQLiteStore
 
 
 # Define the expected default settings structure
@@ -27,7 +38,11 @@ default_settings = {
         },
         "Location":{
             "E:/": None
-        }
+        },
+        "Storage": {
+            "json": None
+        },
+        "PinUnlockSeconds": 0
     }
 }
 
@@ -35,8 +50,39 @@ settings_file = "settings.json"
 
 #files path 
 db_file = os.path.join(os.getcwd(), "database/local_database.json")
+sqlite_file = os.path.join(os.getcwd(), "database/local_database.sqlite3")
+journal_snapshot_file = os.path.join(os.getcwd(), "database/local_database.snapshot.json")
+journal_log_file = os.path.join(os.getcwd(), "database/local_database.log")
 settings_file = os.path.join(os.getcwd(), "helpers/settings.json")
 
+# Storage engines selectable through the first key of Settings -> Storage
+STORAGE_ENGINES = ("json", "sqlite", "journal")
+# Seconds an entered PIN stays valid when Settings -> PinUnlockSeconds is missing: ask every time
+DEFAULT_PIN_UNLOCK_SECONDS = 0
+
+_storage_engine = None
+_sqlite_store = None
+_journal_store = None
+
+# What reading or writing a database can raise: a locked SQLite file, an unreadable log...
+# Writers report it and return None, readers let it through to the caller
+STORE_ERRORS = (sqlite3.Error, OSError)
+
+# Parsed database kept in memory while its files are unchanged
+_db_cache = {"signature": None, "data": None, "index": None}
+db_cache_stats = {"hits": 0, "misses": 0}
+
+# The loader thread reads while the UI thread writes, the cache and the stores are only touched holding this
+_db_lock = threading.RLock()
+
+def with_db_lock(function):
+    """Run function holding the database lock."""
+    @functools.wraps(function)
+    def locked(*args, **kwargs):
+        with _db_lock:
+            return function(*args, **kwargs)
+    return locked
+
 def load_settings_data():
     """Load settings from the settings.json file or create it with defaults if missing or invalid."""
     # Ensure the directory for the settings file exists
@@ -61,11 +107,132 @@ def load_settings_data():
         with open(settings_file, "w") as file:
             json.dump(default_settings, file, indent=4)
         return default_settings
+def storage_engine():
+    """Return the configured storage engine name, read from the settings once."""
+    global _storage_engine
+    if _storage_engine is None:
+        storage = load_settings_data()["Settings"].get("Storage") or {"json": None}
+        engine = next(iter(storage), "json").lower()
+        if engine not in STORAGE_ENGINES:
+            print(f"WARNING: Unknown storage engine '{engine}'. Using 'json'.")
+            engine = "json"
+        _storage_engine = engine
+    return _storage_engine
+
+def pin_unlock_seconds(settings_data=None):
+    """Seconds after a correct PIN during which edits and deletes don't ask again, 0 to always ask."""
+    settings_data = settings_data or load_settings_data()
+    unlock = settings_data["Settings"].get("PinUnlockSeconds", DEFAULT_PIN_UNLOCK_SECONDS)
+    try:
+        return max(0, int(unlock))
+    except (TypeError, ValueError):
+        print(f"WARNING: Invalid PIN unlock time '{unlock}'. Using {DEFAULT_PIN_UNLOCK_SECONDS}.")
+        return DEFAULT_PIN_UNLOCK_SECONDS
+
+def get_sqlite_store():
+    """Open the SQLite store, importing the JSON database the first time it is used."""
+    global _sqlite_store
+    if _sqlite_store is None:
+        _sqlite_store = SQLiteStore(sqlite_file)
+        _sqlite_store.migrate_from_json(db_file)
+    return _sqlite_store
+
+def get_journal_store():
+    """Open the journaled store, seeding its snapshot from the JSON database the first time."""
+    global _journal_store
+    if _journal_store is None:
+        _journal_store = JournalStore(journal_snapshot_file, journal_log_file)
+        _journal_store.migrate_from_json(db_file)
+    return _journal_store
+
+@with_db_lock
+def get_store():
+    """Return the record store of the configured engine, or None for the plain JSON file."""
+    engine = storage_engine()
+    if engine == "sqlite":
+        return get_sqlite_store()
+    if engine == "journal":
+        return get_journal_store()
+    return None
+
+def database_files():
+    """Files holding the database for the configured storage engine."""
+    engine = storage_engine()
+    if engine == "sqlite":
+        return [sqlite_file]
+    if engine == "journal":
+        return [journal_snapshot_file, journal_log_file]
+    return [db_file]
+
+def database_signature():
+    """(mtime, size, inode) of every database file, None if one of them is missing."""
+    signature = []
+    for path in database_files():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+    return tuple(signature)
+
+@with_db_lock
+def invalidate_db_cache():
+    _db_cache["signature"] = None
+    _db_cache["data"] = None
+    _db_cache["index"] = None
+
+@with_db_lock
 def load_db():
+    """
+    Return the database, from memory while its files have not changed since the last read.
+    Callers get their own copy and are free to modify it.
+    """
+    return copy_database(cached_db())
+
+@with_db_lock
+def cached_db():
+    """
+    The in-memory database itself, read again when its files changed.
+    Not a copy: only the writers in this module change it, keeping its ID index in step.
+    """
+    signature = database_signature()
+    if signature is not None and signature == _db_cache["signature"]:
+        db_cache_stats["hits"] += 1
+        return _db_cache["data"]
+
+    db_cache_stats["misses"] += 1
+    data = read_db()
+    # Entries written before record IDs existed get theirs once, and keep them
+    assigned = assign_ids(data)
+    if assigned:
+        print(f"DEBUG: Assigned record IDs to {assigned} entries.")
+        store_db(data)
+        signature = None
+    # Stat again, the file is created on first read
+    _db_cache["signature"] = signature or database_signature()
+    _db_cache["data"] = data
+    _db_cache["index"] = None
+    return data
+
+@with_db_lock
+def cached_index():
+    """(cached_db(), its record ID -> (brand, entry) index), the index built once per read."""
+    data = cached_db()
+    if _db_cache["index"] is None:
+        _db_cache["index"] = record_index(data)
+    return data, _db_cache["index"]
+
+@with_db_lock
+def read_db():
     """
     Load the database from a local JSON file.
     If the file or directory does not exist, create it.
+    A SQLite or journal store that can't be read raises one of STORE_ERRORS.
     """
+    store = get_store()
+    if store is not None:
+        return store.load()
+
     os.makedirs(os.path.dirname(db_file), exist_ok=True)
     
     # Create the file if it doesn't exist
@@ -81,24 +248,244 @@ def load_db():
         # Return an empty dictionary on failure
         return {}
     
+def iter_json_entries(text):
+    """
+    Decode a brand -> list of entries JSON document one entry at a time.
+    Yields (brand, entry, progress) with progress going from 0 to 1.
+    Raises ValueError if the document does not have that layout.
+    """
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r"\s*")
+    length = len(text) or 1
+
+    def expect(position, characters):
+        position = whitespace.match(text, position).end()
+        if position >= len(text) or text[position] not in characters:
+            raise ValueError(f"Expected one of '{characters}' at position {position}")
+        return text[position], whitespace.match(text, position + 1).end()
+
+    _, position = expect(0, "{")
+    if text[position:position + 1] == "}":
+        return
+    while True:
+        brand, position = decoder.raw_decode(text, position)
+        _, position = expect(position, ":")
+        _, position = expect(position, "[")
+        if text[position:position + 1] == "]":
+            position += 1
+        else:
+            while True:
+                entry, position = decoder.raw_decode(text, position)
+                yield brand, entry, position / length
+                separator, position = expect(position, ",]")
+                if separator == "]":
+                    break
+        separator, position = expect(position, ",}")
+        if separator == "}":
+            return
+
+def iter_db_entries():
+    """
+    Yield (brand, entry, progress) for every entry of the database, progress going from 0 to 1.
+    The JSON file is decoded entry by entry so the first ones are available right away.
+    Meant for a loader thread, so it only reads: entries written before record IDs
+    existed come out without one, load_db gives them theirs.
+    """
+    with _db_lock:
+        store = get_store()
+        if store is not None:
+            data = store.load()
+        else:
+            # Creates the file if needed
+            if not os.path.exists(db_file):
+                read_db()
+            try:
+                with open(db_file, "r") as file:
+                    text = file.read()
+            except IOError:
+                return
+
+    if store is not None:
+        total = sum(len(items) for items in data.values()) or 1
+        count = 0
+        for brand, items in data.items():
+            for entry in items:
+                count += 1
+                yield brand, entry, count / total
+        return
+
+    yield from iter_json_entries(text)
+
+@with_db_lock
 def save_db(data):
     """
-    Save the given data to the local database file.
+    Save the given data to the local database file. Returns False if it couldn't be written.
     """
+    return store_db(copy_database(data))
+
+@with_db_lock
+def store_db(data, index=None):
+    """
+    Save data and keep it, not a copy, as the cached database along with its
+    record index when one is given. Used by save_db and the in-place writers.
+    Returns False if it couldn't be written, the cache is then left empty.
+    """
+    store = get_store()
+    invalidate_db_cache()
     try:
-        # Ensure the directory exists before saving
-        os.makedirs(os.path.dirname(db_file), exist_ok=True)
-        
-        # Save the data to the file with pretty formatting
-        with open(db_file, "w") as file:
-            json.dump(data, file, indent=4)
-            
-    
-    except (IOError, OSError) as e:
-        # Handle file-related errors such as permission issues
+        if store is not None:
+            store.save(data)
+        else:
+            # Ensure the directory exists before saving
+            os.makedirs(os.path.dirname(db_file), exist_ok=True)
+
+            # Save the data to the file with pretty formatting
+            with open(db_file, "w") as file:
+                json.dump(data, file, indent=4)
+
+        # What was just written is what the next load_db would read
+        _db_cache["signature"] = database_signature()
+        _db_cache["data"] = data
+        _db_cache["index"] = index
+        return True
+
+    except STORE_ERRORS as e:
+        # Handle file-related errors such as permission issues, or a locked database
         print(f"Error: Unable to save the database file. Details: {e}")
     
     except TypeError as e:
         # Handle errors if data contains unsupported types
         print(f"Error: Unable to encode data to JSON. Details: {e}")
+    return False
+
+@with_db_lock
+def find_entry(brand, model, device_type, exclude_id=None):
+    """
+    Return the first entry with the given Brand, Model and Type, compared by entry_key, or None.
+    The record with ID exclude_id is skipped, so an edited record doesn't conflict with itself.
+    """
+    store = get_store()
+    if store is not None:
+        return store.find(brand, model, device_type, exclude_id)
+
+    found = find_record(cached_db(), brand, model, device_type, exclude_id)
+    return dict(found[1]) if found else None
+
+@with_db_lock
+def upsert_entry(brand, entry):
+    """
+    Merge entry into the existing entry with the same Brand, Model and Type (compared by
+    entry_key, like upsert_entries), or add it. A matched entry keeps its own spelling of
+    Model and Type. Returns True when an existing entry was updated, None if the database
+    couldn't be written.
+    """
+    store = get_store()
+    if store is not None:
+        invalidate_db_cache()
+        try:
+            return store.upsert(brand, entry)
+        except STORE_ERRORS as e:
+            print(f"Error: Unable to save the entry. Details: {e}")
+            return None
+
+    data, index = cached_index()
+    found = find_record(data, brand, entry.get("Model", ""), entry.get("Type", ""))
+    if found:
+        found[1].update(merge_fields(entry))
+    else:
+        brand = brand_spelling(data, brand)
+        entry = with_record_id(entry)
+        data.setdefault(brand, []).append(entry)
+        index[entry[ID_FIELD]] = (brand, entry)
+    if not store_db(data, index):
+        return None
+    return found is not None
+
+@with_db_lock
+def upsert_entries(records, overwrite=True):
+    """
+    Add or update many entries with one load and one save.
+    records are (brand, entry) pairs, matched against the database and each other
+    through a hash index on entry_key. A match is merged into when overwrite is set,
+    keeping its own spelling of Model and Type, otherwise it is left untouched and
+    reported as a conflict.
+    Returns {"inserted": [...], "updated": [...], "conflicts": [...]} of (brand, model, type),
+    or None if the database couldn't be written.
+    """
+    data = load_db()
+    summary = {"inserted": [], "updated": [], "conflicts": []}
+    # Normalized brand -> brand as written in the database, so "hp" lands in "HP"
+    brands = {}
+    index = {}
+    for brand, items in data.items():
+        brands.setdefault(brand.strip().casefold(), brand)
+        for item in items:
+            # First match wins, like upsert_entry
+            index.setdefault(entry_key(brand, item.get("Model", ""), item.get("Type", "")), item)
+
+    for brand, entry in records:
+        key = entry_key(brand, entry.get("Model", ""), entry.get("Type", ""))
+        existing_entry = index.get(key)
+        if existing_entry is None:
+            brand = brands.setdefault(key[0], brand)
+            # IDs are only ever handed out here, never taken from the records
+            entry = {ID_FIELD: new_record_id(), **{field: value for field, value in entry.items() if field != ID_FIELD}}
+            data.setdefault(brand, []).append(entry)
+            index[key] = entry
+            summary["inserted"].append((brand, entry.get("Model", ""), entry.get("Type", "")))
+            continue
+        # Reported, and kept, as spelled in the database
+        found = (brands[key[0]], existing_entry.get("Model", ""), existing_entry.get("Type", ""))
+        if overwrite:
+            existing_entry.update(merge_fields(entry))
+            summary["updated"].append(found)
+        else:
+            summary["conflicts"].append(found)
+
+    if (summary["inserted"] or summary["updated"]) and not save_db(data):
+        return None
+    return summary
+
+@with_db_lock
+def update_records(changes):
+    """
+    Change records by ID: {record ID: (brand, fields)}, fields merged into the record,
+    which moves to brand unless brand is None. One write for the whole batch.
+    Returns the number of records changed, None if the database couldn't be written.
+    """
+    store = get_store()
+    if store is not None:
+        invalidate_db_cache()
+        try:
+            return store.update_records(changes)
+        except STORE_ERRORS as e:
+            print(f"Error: Unable to update the entries. Details: {e}")
+            return None
+
+    # The records are found through the cached ID index and changed in place
+    data, index = cached_index()
+    updated = merge_records(data, changes, index)
+    if updated and not store_db(data, index):
+        return None
+    return updated
+
+@with_db_lock
+def delete_records(record_ids):
+    """
+    Delete the records with the given IDs, one write for the whole batch.
+    Returns the number deleted, None if the database couldn't be written.
+    """
+    store = get_store()
+    if store is not None:
+        invalidate_db_cache()
+        try:
+            return store.delete_records(record_ids)
+        except STORE_ERRORS as e:
+            print(f"Error: Unable to delete the entries. Details: {e}")
+            return None
 
+    data, index = cached_index()
+    deleted = remove_records(data, record_ids, index)
+    if deleted and not store_db(data, index):
+        return None
+    return deleted
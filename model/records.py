@@ -0,0 +1,122 @@
+import uuid
+
+
+def copy_database(data):
+    """Copy a brand -> list of entries database, entries only hold plain values."""
+    return {brand: [dict(entry) for entry in items] for brand, items in data.items()}
+
+
+# Reserved entry field holding the record's unique ID, never shown as a column
+ID_FIELD = "_id"
+
+
+def new_record_id():
+    return uuid.uuid4().hex
+
+
+def with_record_id(entry):
+    """The entry with an ID, a fresh one when it has none."""
+    if entry.get(ID_FIELD):
+        return entry
+    return {ID_FIELD: new_record_id(), **entry}
+
+
+def normalize_value(value):
+    """A field value as compared: equal for values that differ only by case or surrounding spaces."""
+    return str(value).strip().casefold()
+
+
+def entry_key(brand, model, device_type):
+    """Normalized (Brand, Model, Type), see normalize_value."""
+    return tuple(normalize_value(value) for value in (brand, model, device_type))
+
+
+def find_record(data, brand, model, device_type, exclude_id=None):
+    """
+    (brand, entry) of the first entry matching Brand, Model and Type by entry_key, or None.
+    The record with ID exclude_id is skipped.
+    """
+    key = entry_key(brand, model, device_type)
+    for record_brand, items in data.items():
+        if record_brand.strip().casefold() != key[0]:
+            continue
+        for entry in items:
+            if (entry_key(record_brand, entry.get("Model", ""), entry.get("Type", "")) == key and
+                    (exclude_id is None or entry.get(ID_FIELD) != exclude_id)):
+                return record_brand, entry
+    return None
+
+
+def brand_spelling(data, brand):
+    """The brand as already written in data when it is there in another case, so "hp" lands in "HP"."""
+    key = brand.strip().casefold()
+    return next((record_brand for record_brand in data if record_brand.strip().casefold() == key), brand)
+
+
+def merge_fields(entry):
+    """The fields of entry to merge into a matching record, which keeps its own Model, Type and ID."""
+    return {field: value for field, value in entry.items() if field not in ("Model", "Type", ID_FIELD)}
+
+
+def assign_ids(data):
+    """Give every entry without an ID a new one, in place. Returns how many were assigned."""
+    assigned = 0
+    for items in data.values():
+        for entry in items:
+            if not entry.get(ID_FIELD):
+                entry[ID_FIELD] = new_record_id()
+                assigned += 1
+    return assigned
+
+
+def record_index(data):
+    """ID -> (brand, entry) for every entry of the database."""
+    return {entry.get(ID_FIELD): (brand, entry) for brand, items in data.items() for entry in items}
+
+
+def merge_records(data, changes, index=None):
+    """
+    Apply {record ID: (brand, fields)} to data in place. fields are merged into the record,
+    which moves to brand unless brand is None. Returns the number of records changed.
+    index is the record_index of data, kept up to date; built here when not given.
+    """
+    if index is None:
+        index = record_index(data)
+    updated = 0
+    for record_id, (brand, fields) in changes.items():
+        found = index.get(record_id)
+        if found is None:
+            continue
+        old_brand, entry = found
+        entry.update((field, value) for field, value in fields.items() if field != ID_FIELD)
+        if brand is not None and brand != old_brand:
+            items = data[old_brand]
+            del items[next(position for position, item in enumerate(items) if item is entry)]
+            if not items:
+                del data[old_brand]
+            data.setdefault(brand, []).append(entry)
+            index[record_id] = (brand, entry)
+        updated += 1
+    return updated
+
+
+def remove_records(data, record_ids, index=None):
+    """
+    Remove the records with the given IDs from data in place. Returns the number removed.
+    index is the record_index of data, kept up to date; built here when not given.
+    Only the brands holding one of the records are touched.
+    """
+    if index is None:
+        index = record_index(data)
+    by_brand = {}
+    for record_id in set(record_ids):
+        found = index.pop(record_id, None)
+        if found is not None:
+            by_brand.setdefault(found[0], set()).add(record_id)
+    for brand, brand_ids in by_brand.items():
+        kept = [entry for entry in data[brand] if entry.get(ID_FIELD) not in brand_ids]
+        if kept:
+            data[brand] = kept
+        else:
+            del data[brand]
+    return sum(len(brand_ids) for brand_ids in by_brand.values())
@@ -0,0 +1,126 @@
+# Length of the substrings stored in the inverted index
+GRAM_SIZE = 3
+
+
+def row_grams(text):
+    """Return the set of trigrams found in the given text."""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class SearchIndex:
+    """
+    Trigram inverted index over the lowercased text of each table row.
+    Rows are identified by opaque keys handed out by the table model, so the
+    index survives rows being inserted or removed around them.
+    """
+    def __init__(self):
+        self._blobs = {}
+        self._postings = {}
+        # Set once a snapshot shares the dicts above, the next change copies them first
+        self._shared = False
+        # Grams whose key sets belong to this index alone, None when they all do
+        self._owned_grams = None
+        # Bumped on every change, lets callers know when cached results are stale
+        self.version = 0
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def snapshot(self):
+        """
+        Read-only copy of the current contents, safe to search on another thread.
+        Nothing it holds is changed in place afterwards: the next change to this
+        index copies the dicts first, and each key set the first time it is touched.
+        """
+        view = SearchIndex()
+        view._blobs, view._postings, view.version = self._blobs, self._postings, self.version
+        self._shared = True
+        return view
+
+    def _detach(self):
+        if self._shared:
+            self._blobs = dict(self._blobs)
+            self._postings = dict(self._postings)
+            self._owned_grams = set()
+            self._shared = False
+
+    def _gram_keys(self, gram):
+        """The key set of gram, ready to be changed in place."""
+        keys = self._postings.get(gram)
+        if keys is None:
+            keys = self._postings[gram] = set()
+        elif self._owned_grams is not None and gram not in self._owned_grams:
+            keys = self._postings[gram] = set(keys)
+        else:
+            return keys
+        if self._owned_grams is not None:
+            self._owned_grams.add(gram)
+        return keys
+
+    def clear(self):
+        # New dicts rather than clearing, a snapshot may still be reading the old ones
+        self._blobs = {}
+        self._postings = {}
+        self._shared = False
+        self._owned_grams = None
+        self.version += 1
+
+    def rebuild(self, rows):
+        """Replace the index contents with the given (key, values) pairs."""
+        self.clear()
+        for key, values in rows:
+            self.add(key, values)
+
+    def add(self, key, values):
+        self._detach()
+        blob = " ".join(values).lower()
+        self._blobs[key] = blob
+        for gram in row_grams(blob):
+            self._gram_keys(gram).add(key)
+        self.version += 1
+
+    def remove(self, key):
+        if key not in self._blobs:
+            return
+        self._detach()
+        blob = self._blobs.pop(key)
+        for gram in row_grams(blob):
+            if gram in self._postings:
+                keys = self._gram_keys(gram)
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+        self.version += 1
+
+    def update(self, key, values):
+        self.remove(key)
+        self.add(key, values)
+
+    def search(self, text, candidates=None):
+        """
+        Return the set of keys whose row contains every word of the given text.
+        When candidates is given only those keys are considered.
+        """
+        words = text.lower().split()
+        matches = None if candidates is None else self._blobs.keys() & candidates
+
+        # Narrow down with the posting lists, rarest trigram first
+        postings = [
+            self._postings.get(gram, set())
+            for word in words if len(word) >= GRAM_SIZE
+            for gram in row_grams(word)
+        ]
+        for keys in sorted(postings, key=len):
+            matches = set(keys) if matches is None else matches & keys
+            if not matches:
+                return set()
+
+        if matches is None:
+            matches = set(self._blobs)
+
+        # Trigrams only prove an exact match for words of exactly GRAM_SIZE letters
+        unproven = [word for word in words if len(word) != GRAM_SIZE]
+        if not unproven:
+            return matches
+        blobs = self._blobs
+        return {key for key in matches if all(word in blobs[key] for word in unproven)}
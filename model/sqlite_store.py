@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from model.records import ID_FIELD, merge_fields, with_record_id
+
+
+# Brand, Model and Type compared case-insensitively and without surrounding spaces, like entry_key.
+# SQLite's lower() only folds ASCII letters, values the forms write are uppercased already.
+KEY_MATCH = "lower(trim(brand)) = ? AND lower(trim(model)) = ? AND lower(trim(type)) = ?"
+
+
+def key_params(brand, model, device_type):
+    return tuple(str(value).strip().lower() for value in (brand, model, device_type))
+
+
+class SQLiteStore:
+    """
+    Device records stored in an SQLite database with an index on (Brand, Model, Type).
+    Presents the same brand -> list of entries layout as the JSON database,
+    but single records can be looked up, added, updated and deleted without
+    rewriting everything.
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS devices (
+                    id INTEGER PRIMARY KEY,
+                    brand TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    fields TEXT NOT NULL,
+                    uid TEXT
+                )
+            """)
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS devices_match ON devices (lower(trim(brand)), lower(trim(model)), lower(trim(type)))"
+            )
+            connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS devices_uid ON devices (uid)")
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @contextmanager
+    def connect(self):
+        # One short-lived connection per operation, safe to use from any thread
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def row_values(brand, entry):
+        return (brand, str(entry.get("Model", "")), str(entry.get("Type", "")), json.dumps(entry), entry.get(ID_FIELD))
+
+    def load(self):
+        data = {}
+        with self.connect() as connection:
+            for brand, fields in connection.execute("SELECT brand, fields FROM devices ORDER BY id"):
+                data.setdefault(brand, []).append(json.loads(fields))
+        return data
+
+    def save(self, data):
+        """Replace every record with the contents of data in one transaction."""
+        with self.connect() as connection:
+            connection.execute("DELETE FROM devices")
+            connection.executemany(
+                "INSERT INTO devices (brand, model, type, fields, uid) VALUES (?, ?, ?, ?, ?)",
+                (self.row_values(brand, entry) for brand, items in data.items() for entry in items)
+            )
+
+    def find(self, brand, model, device_type, exclude_id=None):
+        with self.connect() as connection:
+            row = connection.execute(
+                f"SELECT fields FROM devices WHERE {KEY_MATCH} AND (? IS NULL OR uid IS NOT ?) ORDER BY id LIMIT 1",
+                (*key_params(brand, model, device_type), exclude_id, exclude_id)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert(self, brand, entry):
+        """
+        Merge entry into the first record with the same Brand, Model and Type (see KEY_MATCH),
+        which keeps its own spelling of them, or add it. Returns True when an existing record was updated.
+        """
+        params = key_params(brand, entry.get("Model", ""), entry.get("Type", ""))
+        with self.connect() as connection:
+            row = connection.execute(
+                f"SELECT id, fields FROM devices WHERE {KEY_MATCH} ORDER BY id LIMIT 1", params
+            ).fetchone()
+            if row:
+                merged = json.loads(row[1])
+                merged.update(merge_fields(entry))
+                connection.execute("UPDATE devices SET fields = ? WHERE id = ?", (json.dumps(merged), row[0]))
+                return True
+            # A brand already there in another case keeps its spelling
+            existing_brand = connection.execute(
+                "SELECT brand FROM devices WHERE lower(trim(brand)) = ? LIMIT 1", params[:1]
+            ).fetchone()
+            brand = existing_brand[0] if existing_brand else brand
+            connection.execute(
+                "INSERT INTO devices (brand, model, type, fields, uid) VALUES (?, ?, ?, ?, ?)",
+                self.row_values(brand, with_record_id(entry))
+            )
+            return False
+
+    def update_records(self, changes):
+        """
+        Apply {record ID: (brand or None, fields)} in one transaction, each record found
+        through the uid index. Returns the number of records changed.
+        """
+        updated = 0
+        with self.connect() as connection:
+            for record_id, (brand, fields) in changes.items():
+                row = connection.execute("SELECT id, brand, fields FROM devices WHERE uid = ?", (record_id,)).fetchone()
+                if row is None:
+                    continue
+                merged = json.loads(row[2])
+                merged.update((field, value) for field, value in fields.items() if field != ID_FIELD)
+                connection.execute(
+                    "UPDATE devices SET brand = ?, model = ?, type = ?, fields = ?, uid = ? WHERE id = ?",
+                    (*self.row_values(brand if brand is not None else row[1], merged), row[0])
+                )
+                updated += 1
+        return updated
+
+    def delete_records(self, record_ids):
+        """Delete the records with the given IDs in one transaction. Returns the number deleted."""
+        with self.connect() as connection:
+            before = connection.total_changes
+            connection.executemany("DELETE FROM devices WHERE uid = ?", ((record_id,) for record_id in set(record_ids)))
+            return connection.total_changes - before
+
+    def migrate_from_json(self, json_path):
+        """
+        One-time import of an existing JSON database, the JSON file is left untouched.
+        Returns True if entries were imported.
+        """
+        with self.connect() as connection:
+            if connection.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+                return False
+            data = {}
+            if os.path.exists(json_path):
+                try:
+                    with open(json_path, "r") as file:
+                        data = json.load(file)
+                except (json.JSONDecodeError, IOError) as e:
+                    print(f"Error: Unable to migrate the JSON database. Details: {e}")
+                    return False
+            connection.executemany(
+                "INSERT INTO devices (brand, model, type, fields, uid) VALUES (?, ?, ?, ?, ?)",
+                (self.row_values(brand, entry) for brand, items in data.items() for entry in items)
+            )
+            connection.execute("INSERT INTO meta (key, value) VALUES ('migrated', ?)", (json_path,))
+        if data:
+            print(f"DEBUG: Migrated {sum(len(items) for items in data.values())} entries from '{json_path}'.")
+        return bool(data)
@@ -0,0 +1,334 @@
+from collections import deque
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+from model.records import ID_FIELD
+from model.search_index import SearchIndex
+
+
+# Columns that always come first, in this order
+PRIORITY_HEADERS = ["Brand", "Model", "Type"]
+
+# Shared role values, created once instead of once per cell
+IMAGE_DONE_COLOR = QColor("#5f8244")
+IMAGE_NOT_DONE_COLOR = QColor("#bd4613")
+CELL_ALIGNMENT = int(Qt.AlignCenter)
+CELL_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+# Hidden role carrying the record ID of a row, the same for every column
+RECORD_ID_ROLE = Qt.UserRole + 1
+
+# Optional computed column showing where each device's image folder is
+FOLDER_HEADER = "Image Folder"
+FOLDER_PENDING_TEXT = "..."
+FOLDER_MISSING_TEXT = "NOT FOUND"
+FOLDER_UNREACHABLE_TEXT = "UNREACHABLE"
+FOLDER_UNREACHABLE_COLOR = QColor("#b58b00")
+
+# Rows moved from the pending queue into the table per fetchMore call
+FETCH_BATCH_SIZE = 1000
+
+
+def ordered_headers(data):
+    """Priority headers followed by every other key found in the data, sorted."""
+    additional_headers = sorted(
+        {key for items in data.values() for item in items for key in item.keys()} - set(PRIORITY_HEADERS) - {ID_FIELD}
+    )
+    return PRIORITY_HEADERS + additional_headers
+
+
+def entry_row(brand, item, headers):
+    """One entry as a tuple of display strings in header order."""
+    return tuple(str(item.get(header, brand if header == "Brand" else "")) for header in headers)
+
+
+def database_rows(data, headers):
+    """Yield (record ID, row tuple) for every entry of the database."""
+    for brand, items in data.items():
+        for item in items:
+            yield item.get(ID_FIELD), entry_row(brand, item, headers)
+
+
+class DeviceTableModel(QAbstractTableModel):
+    """
+    Read-only table model backed by one list of strings per column.
+    Text, alignment and the Image colour are computed in data() only when the view asks,
+    so no per-cell objects are kept alive.
+    Every row also gets a stable key used by the search index, and carries the
+    record ID of its entry (RECORD_ID_ROLE).
+    Entries can also be streamed in: queued (brand, entry) pairs reach the table in
+    batches through canFetchMore/fetchMore.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._headers = []
+        self._columns = []
+        self._keys = []
+        self._ids = []
+        self._next_key = 0
+        self._row_count = 0
+        self._image_column = -1
+        self._pending = deque()
+        self.search_index = SearchIndex()
+        # (Brand, Model, Type) -> folder path, "" when missing or None when unreachable;
+        # None while the column is hidden
+        self._folder_status = None
+
+    def load_database(self, data):
+        """Replace the whole table with the contents of a brand -> list of entries database."""
+        self._pending.clear()
+        headers = ordered_headers(data)
+        columns = []
+        for header in headers:
+            # Repeated values (Type, Image, Windows Version...) share one string object
+            interned = {}
+            if header == "Brand":
+                values = (str(item.get(header, brand)) for brand, items in data.items() for item in items)
+            else:
+                values = (str(item.get(header, "")) for items in data.values() for item in items)
+            columns.append([interned.setdefault(value, value) for value in values])
+
+        ids = [item.get(ID_FIELD) for items in data.values() for item in items]
+        row_count = len(ids)
+        keys = list(range(self._next_key, self._next_key + row_count))
+
+        self.beginResetModel()
+        self._headers = headers
+        self._columns = columns
+        self._keys = keys
+        self._ids = ids
+        self._next_key += row_count
+        self._row_count = row_count
+        self._image_column = headers.index("Image") if "Image" in headers else -1
+        self.search_index.rebuild(zip(keys, zip(*columns)))
+        self.endResetModel()
+
+    def update_database(self, data):
+        """
+        Bring the table in line with data, touching only the rows that differ.
+        Rows are matched on their record ID: missing ones are removed, changed ones
+        updated in place and new ones appended, so selection, scroll position and sorting survive.
+        Falls back to a full reload when the columns change.
+        """
+        self._pending.clear()
+        headers = ordered_headers(data)
+        if headers != self._headers or not self._row_count:
+            self.load_database(data)
+            return
+
+        new_rows = dict(database_rows(data, headers))
+        removed, changed = [], []
+        for row, (record_id, values) in enumerate(zip(self._ids, zip(*self._columns))):
+            new_values = new_rows.pop(record_id, None)
+            if new_values is None:
+                removed.append(row)
+            elif new_values != values:
+                changed.append((row, new_values))
+        # Whatever is left did not exist before
+        added = list(new_rows.items())
+
+        for row, values in changed:
+            for column, value in zip(self._columns, values):
+                column[row] = value
+            self.search_index.update(self._keys[row], values)
+        # Announced once everything is in place, one signal per contiguous range: a filtering
+        # proxy then searches the updated index once instead of once per row
+        last_column = len(self._headers) - 1
+        changed_rows = [row for row, _ in changed]
+        while changed_rows:
+            last = first = changed_rows.pop()
+            while changed_rows and changed_rows[-1] == first - 1:
+                first = changed_rows.pop()
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_column))
+
+        # Remove contiguous ranges from the bottom up so earlier row numbers stay valid
+        while removed:
+            last = first = removed.pop()
+            while removed and removed[-1] == first - 1:
+                first = removed.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for key in self._keys[first:last + 1]:
+                self.search_index.remove(key)
+            for column in self._columns:
+                del column[first:last + 1]
+            del self._keys[first:last + 1]
+            del self._ids[first:last + 1]
+            self._row_count -= last - first + 1
+            self.endRemoveRows()
+
+        self.append_rows(added)
+
+    def append_rows(self, rows):
+        """Add (record ID, row tuple in header order) pairs at the bottom of the table."""
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(rows) - 1)
+        for record_id, values in rows:
+            for column, value in zip(self._columns, values):
+                column.append(value)
+            self._ids.append(record_id)
+            self._keys.append(self._next_key)
+            self.search_index.add(self._next_key, values)
+            self._next_key += 1
+        self._row_count += len(rows)
+        self.endInsertRows()
+
+    def begin_streaming(self):
+        """Empty the table ahead of entries arriving through queue_entries."""
+        self.beginResetModel()
+        self._headers = list(PRIORITY_HEADERS)
+        self._columns = [[] for _ in self._headers]
+        self._keys = []
+        self._ids = []
+        self._row_count = 0
+        self._image_column = -1
+        self._pending.clear()
+        self.search_index.clear()
+        self.endResetModel()
+
+    def queue_entries(self, entries):
+        """Queue (brand, entry) pairs, they are added to the table by fetchMore."""
+        self._pending.extend(entries)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and bool(self._pending)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        batch = [self._pending.popleft() for _ in range(min(FETCH_BATCH_SIZE, len(self._pending)))]
+        new_headers = {key for _, item in batch for key in item} - set(self._headers) - {ID_FIELD}
+        if new_headers:
+            self.insert_headers(new_headers)
+        self.append_rows([(item.get(ID_FIELD), entry_row(brand, item, self._headers)) for brand, item in batch])
+
+    def insert_headers(self, new_headers):
+        """Add columns in their sorted place, existing rows get an empty value."""
+        additional_headers = self._headers[len(PRIORITY_HEADERS):]
+        ordered = PRIORITY_HEADERS + sorted(set(additional_headers) | set(new_headers))
+        for position, header in enumerate(ordered):
+            if position < len(self._headers) and self._headers[position] == header:
+                continue
+            self.beginInsertColumns(QModelIndex(), position, position)
+            self._headers.insert(position, header)
+            self._columns.insert(position, [""] * self._row_count)
+            self.endInsertColumns()
+        self._image_column = self._headers.index("Image") if "Image" in self._headers else -1
+
+    def headers(self):
+        return list(self._headers)
+
+    def brands(self):
+        """Distinct values of the Brand column."""
+        return set(self._columns[0]) if self._columns else set()
+
+    def distinct_values(self, header):
+        """Every value shown in the given column."""
+        return set(self._columns[self._headers.index(header)]) if header in self._headers else set()
+
+    def devices(self):
+        """Brand -> set of (Model, Type) for every row."""
+        devices = {}
+        for brand, model, device_type in zip(*self._columns[:len(PRIORITY_HEADERS)]):
+            devices.setdefault(brand, set()).add((model, device_type))
+        return devices
+
+    def folder_column_visible(self):
+        return self._folder_status is not None
+
+    def set_folder_column_visible(self, visible):
+        """Show or hide the computed folder column, always the last one."""
+        if visible == self.folder_column_visible():
+            return
+        position = len(self._headers)
+        if visible:
+            self.beginInsertColumns(QModelIndex(), position, position)
+            self._folder_status = {}
+            self.endInsertColumns()
+        else:
+            self.beginRemoveColumns(QModelIndex(), position, position)
+            self._folder_status = None
+            self.endRemoveColumns()
+
+    def update_folder_status(self, statuses):
+        """Record resolved folders, (Brand, Model, Type) -> path, "" when missing or None when unreachable."""
+        if self._folder_status is None:
+            return
+        self._folder_status.update(statuses)
+        if self._row_count:
+            column = len(self._headers)
+            self.dataChanged.emit(self.index(0, column), self.index(self._row_count - 1, column))
+
+    def folder_text(self, row):
+        key = tuple(column[row] for column in self._columns[:len(PRIORITY_HEADERS)])
+        if key not in self._folder_status:
+            return FOLDER_PENDING_TEXT
+        status = self._folder_status[key]
+        if status is None:
+            return FOLDER_UNREACHABLE_TEXT
+        return status or FOLDER_MISSING_TEXT
+
+    def row_key(self, row):
+        return self._keys[row]
+
+    def row_id(self, row):
+        """Record ID of the entry shown in the given row."""
+        return self._ids[row]
+
+    def row_data(self, row):
+        """Return the given row as a header -> text dictionary."""
+        return {header: column[row] for header, column in zip(self._headers, self._columns)}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers) + (1 if self.folder_column_visible() else 0)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == RECORD_ID_ROLE:
+            return self._ids[index.row()]
+        if index.column() == len(self._headers):
+            return self.folder_data(index.row(), role)
+        if role == Qt.DisplayRole:
+            return self._columns[index.column()][index.row()]
+        if role == Qt.TextAlignmentRole:
+            return CELL_ALIGNMENT
+        if role == Qt.BackgroundRole and index.column() == self._image_column:
+            # Conditional formatting for the 'Image' column
+            if self._columns[index.column()][index.row()] == "DONE":
+                return IMAGE_DONE_COLOR
+            return IMAGE_NOT_DONE_COLOR
+        return None
+
+    def folder_data(self, row, role):
+        if role == Qt.DisplayRole:
+            return self.folder_text(row)
+        if role == Qt.TextAlignmentRole:
+            return CELL_ALIGNMENT
+        if role == Qt.BackgroundRole:
+            text = self.folder_text(row)
+            if text == FOLDER_PENDING_TEXT:
+                return None
+            if text == FOLDER_UNREACHABLE_TEXT:
+                return FOLDER_UNREACHABLE_COLOR
+            return IMAGE_NOT_DONE_COLOR if text == FOLDER_MISSING_TEXT else IMAGE_DONE_COLOR
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            if 0 <= section < len(self._headers):
+                return self._headers[section]
+            if section == len(self._headers) and self.folder_column_visible():
+                return FOLDER_HEADER
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        # Cells are never editable from the table
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return CELL_FLAGS
@@ -2,13 +2,51 @@ from PyQt5.QtWidgets import (
     QApplication, QComboBox, QLineEdit, QPushButton, QLabel,
     QVBoxLayout, QGridLayout, QWidget
 )
-from PyQt5.QtGui import QFont, QMouseEvent, QPalette, QBrush, QPixmap, QColor, QIcon
+from PyQt5.QtGui import QFont, QMouseEvent, QIcon, QValidator
 from PyQt5.QtCore import pyqtSignal, Qt, QPoint
 
-from model.json_logic import load_db, load_settings_data, save_db
+from model.json_logic import STORE_ERRORS, entry_key, find_entry, update_records, upsert_entry
+from helpers.background import apply_background, random_background_path
 from helpers.messages_dialog import confirm_message, show_message
-
-import random
+from helpers.settings_service import settings_service
+
+
+# Added once to the application stylesheet, so restyling the form never parses CSS again.
+# The submit button turns green through its "valid" property.
+FORM_STYLESHEET = """
+    AddToDatabaseWindow QLabel {
+        color: white;
+    }
+    AddToDatabaseWindow QPushButton#submit_button {
+        background-color: orange;
+        color: white;
+        font-weight: bold;
+        border: none;
+        border-radius: 5px;
+        padding: 10px;
+    }
+    AddToDatabaseWindow QPushButton#submit_button:hover {
+        background-color: darkorange;
+    }
+    AddToDatabaseWindow QPushButton#submit_button[valid="true"] {
+        background-color: green;
+    }
+    AddToDatabaseWindow QPushButton#submit_button[valid="true"]:hover {
+        background-color: darkgreen;
+    }
+"""
+
+
+def install_form_stylesheet():
+    app = QApplication.instance()
+    if FORM_STYLESHEET not in app.styleSheet():
+        app.setStyleSheet(app.styleSheet() + FORM_STYLESHEET)
+
+
+class UppercaseValidator(QValidator):
+    """Turns typed text upper case as it is entered, without a second textChanged round trip"""
+    def validate(self, text, position):
+        return QValidator.Acceptable, text.upper(), position
 
 
 class AddToDatabaseWindow(QWidget):
@@ -17,6 +55,10 @@ class AddToDatabaseWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.drag_position = QPoint()
+        # ID of the record being edited, None when adding
+        self.record_id = None
+        # (Brand, Model, Type) of that record when the form was filled
+        self.record_key = None
         self.init_ui()
 
     def init_ui(self):
@@ -27,8 +69,8 @@ class AddToDatabaseWindow(QWidget):
         self.setWindowFlags(Qt.Dialog | Qt.WindowTitleHint | Qt.CustomizeWindowHint | Qt.WindowCloseButtonHint)
         self.setWindowTitle("Add New")
         self.setWindowIcon(QIcon("assets/icons/add.svg"))
-        self.set_background_image(f"assets/image/background-{random.randint(1, 4)}.png")
-        self.setStyleSheet("QLabel { color: white; }")
+        self.set_background_image(random_background_path())
+        install_form_stylesheet()
         self.setMinimumSize(500, 300)
 
     def setup_layout(self):
@@ -39,16 +81,17 @@ class AddToDatabaseWindow(QWidget):
         font_settings.setPointSize(12)
         input_height = 35
 
-        # Load Settings Data
-        settings_data = load_settings_data()
-        brand_keys = settings_data["Settings"]["Brands"].keys()
-        types_keys = settings_data["Settings"]["Types"].keys()
-        windows_version_keys = settings_data["Settings"]["WindowsVersions"].keys()
+        # Settings Data, kept up to date while the window is open
+        settings = settings_service()
+        brand_keys = settings.brands()
+        types_keys = settings.types()
+        windows_version_keys = settings.windows_versions()
+        settings.settings_changed.connect(self.refresh_comboboxes)
 
         # Form Fields
         self.brand_combobox = self.create_combobox("Brand", grid_layout, 1, brand_keys, font_settings, input_height)
         self.model_entry = self.create_lineedit("Model", "Example: 840 G3", grid_layout, 2, font_settings, input_height)
-        self.model_entry.textChanged.connect(lambda: self.force_uppercase(self.model_entry))
+        self.model_entry.setValidator(UppercaseValidator(self.model_entry))
 
         self.type_combobox = self.create_combobox("Type", grid_layout, 3, types_keys, font_settings, input_height)
         self.windows_version_combobox = self.create_combobox(
@@ -60,7 +103,7 @@ class AddToDatabaseWindow(QWidget):
 
         # Submit Button
         self.submit_button = self.create_button(
-            "Submit", "orange", self.submit_data, font_settings, (input_height + 5, input_height + 10)
+            "Submit", "submit_button", self.submit_data, font_settings, (input_height + 5, input_height + 10)
         )
         self.submit_button.setMinimumHeight(45)
         self.submit_button.setMinimumWidth(180)
@@ -80,10 +123,25 @@ class AddToDatabaseWindow(QWidget):
         combobox.setFont(font)
         combobox.setEditable(True)
         combobox.setFixedHeight(height)
-        combobox.currentIndexChanged.connect(self.update_submit_button_color)
+        combobox.currentTextChanged.connect(self.update_submit_button_state)
         layout.addWidget(combobox, row, 1)
         return combobox
 
+    def refresh_comboboxes(self):
+        """Reload the combobox choices from the settings, keeping what is selected or typed."""
+        settings = settings_service()
+        for combobox, items in (
+            (self.brand_combobox, settings.brands()),
+            (self.type_combobox, settings.types()),
+            (self.windows_version_combobox, settings.windows_versions()),
+        ):
+            text = combobox.currentText()
+            combobox.blockSignals(True)
+            combobox.clear()
+            combobox.addItems([""] + items)
+            combobox.setCurrentText(text)
+            combobox.blockSignals(False)
+
     def create_lineedit(self, label_text, placeholder, layout, row, font, height):
         label = QLabel(f"{label_text}:")
         label.setFont(font)
@@ -93,28 +151,17 @@ class AddToDatabaseWindow(QWidget):
         line_edit.setPlaceholderText(placeholder)
         line_edit.setFont(font)
         line_edit.setFixedHeight(height)
-        line_edit.textChanged.connect(self.update_submit_button_color)
+        line_edit.textChanged.connect(self.update_submit_button_state)
         layout.addWidget(line_edit, row, 1)
         return line_edit
 
-    def create_button(self, text, color, action, font, size=None):
+    def create_button(self, text, object_name, action, font, size=None):
         button = QPushButton(text)
+        # Styled by FORM_STYLESHEET through its object name
+        button.setObjectName(object_name)
         button.setFont(font)
         if size:
             button.setFixedSize(*size)
-        button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color};
-                color: white;
-                font-weight: bold;
-                border: none;
-                border-radius: 5px;
-                padding: 10px;
-            }}
-            QPushButton:hover {{
-                background-color: dark{color};
-            }}
-        """)
         button.clicked.connect(action)
         return button
 
@@ -128,33 +175,54 @@ class AddToDatabaseWindow(QWidget):
         form_data = {key: value.upper() if isinstance(value, str) else value for key, value in form_data.items()}
 
         brand = form_data.pop("Brand")
-        data = load_db()
+        try:
+            existing_entry = self.find_existing_entry(brand, form_data)
+        except STORE_ERRORS as e:
+            # Locked by a command line import, or unreachable
+            print(f"ERROR: Unable to look up the entry: {e}")
+            show_message("critical", "Error", f"Unable to read the database, it may be in use. Please try again.\n\n{e}")
+            return
 
-        if brand not in data:
-            data[brand] = []
+        if self.record_id is not None:
+            self.save_edited_entry(brand, form_data, existing_entry)
+            return
 
-        existing_entry = self.find_existing_entry(data[brand], form_data)
+        if existing_entry and not self.confirm_overwrite(existing_entry):
+            return
 
+        # Single-entry write, the storage engine looks the entry up by Brand, Model and Type
+        if upsert_entry(brand, form_data) is None:
+            show_message("critical", "Error", "Unable to save the database, it may be in use. Please try again.")
+            return
         if existing_entry:
-            if not self.confirm_overwrite(existing_entry):
-                return
-            existing_entry.update(form_data)
             show_message("information", "Success", "Entry updated successfully!")
         else:
-            data[brand].append(form_data)
             show_message("information", "Success", "Data submitted successfully!")
 
-        save_db(data)
         self.data_added_signal.emit()
         self.clear_fields()
 
-    def find_existing_entry(self, brand_data, form_data):
-        return next(
-            (entry for entry in brand_data if
-             entry.get("Model") == form_data.get("Model") and
-             entry.get("Type") == form_data.get("Type")),
-            None
-        )
+    def save_edited_entry(self, brand, form_data, existing_entry):
+        """Write the form over the record being edited, found by its ID."""
+        # Duplicates already in the database stay editable, only taking another record's key is refused
+        key_changed = entry_key(brand, form_data.get("Model"), form_data.get("Type")) != entry_key(*self.record_key)
+        if existing_entry and key_changed:
+            show_message("warning", "Error", "Another entry already has this Brand, Model and Type.")
+            return
+        updated = update_records({self.record_id: (brand, form_data)})
+        if updated is None:
+            show_message("critical", "Error", "Unable to save the database, it may be in use. Please try again.")
+            return
+        if not updated:
+            show_message("critical", "Error", "The entry no longer exists.")
+            return
+        show_message("information", "Success", "Entry updated successfully!")
+        self.data_added_signal.emit()
+        self.clear_fields()
+
+    def find_existing_entry(self, brand, form_data):
+        # While editing, the record being edited isn't a conflict with itself
+        return find_entry(brand, form_data.get("Model"), form_data.get("Type"), exclude_id=self.record_id)
 
     def confirm_overwrite(self, existing_entry):
         message = (
@@ -167,6 +235,20 @@ class AddToDatabaseWindow(QWidget):
         )
         return confirm_message("Overwrite Confirmation", message)
 
+    def populate(self, item_data, record_id=None):
+        """
+        Refill the form from a table row, to edit that record (or add a new entry when
+        record_id is None). Lets one window be reused instead of building a new one.
+        """
+        self.record_id = record_id
+        self.record_key = tuple(item_data.get(field, "") for field in ("Brand", "Model", "Type"))
+        self.setWindowTitle("Add New" if record_id is None else "Edit Entry")
+        self.brand_combobox.setCurrentText(item_data.get("Brand", ""))
+        self.model_entry.setText(item_data.get("Model", ""))
+        self.type_combobox.setCurrentText(item_data.get("Type", ""))
+        self.windows_version_combobox.setCurrentText(item_data.get("Windows Version", ""))
+        self.image_combobox.setCurrentText(item_data.get("Image", ""))
+
     def get_form_data(self):
         return {
             "Brand": self.brand_combobox.currentText(),
@@ -176,19 +258,14 @@ class AddToDatabaseWindow(QWidget):
             "Image": self.image_combobox.currentText(),
         }
 
-    def update_submit_button_color(self):
-        form_data = self.get_form_data()
-        color = "green" if all(form_data.values()) else "orange"
-        self.submit_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {color};
-                color: white;
-                font-weight: bold;
-            }}
-        """)
-
-    def force_uppercase(self, line_edit):
-        line_edit.setText(line_edit.text().upper())
+    def update_submit_button_state(self):
+        valid = all(self.get_form_data().values())
+        if self.submit_button.property("valid") == valid:
+            return
+        self.submit_button.setProperty("valid", valid)
+        # Re-match the [valid] rules of the already parsed stylesheet
+        self.submit_button.style().unpolish(self.submit_button)
+        self.submit_button.style().polish(self.submit_button)
 
     def clear_fields(self):
         self.brand_combobox.setCurrentIndex(0)
@@ -208,17 +285,7 @@ class AddToDatabaseWindow(QWidget):
             event.accept()
 
     def set_background_image(self, image_path):
-        palette = QPalette()
-        pixmap = QPixmap(image_path)
-
-        if pixmap.isNull():
-            random_color = QColor(*(random.randint(0, 255) for _ in range(3)))
-            palette.setColor(QPalette.Background, random_color)
-        else:
-            scaled_pixmap = pixmap.scaled(self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-            palette.setBrush(QPalette.Background, QBrush(scaled_pixmap))
-
-        self.setPalette(palette)
+        apply_background(self, image_path)
 '''
 # Debug
 
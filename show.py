@@ -1,18 +1,102 @@
+# First import, the startup profile is timed from here
+from helpers.startup_profile import mark_startup, report_startup
 import os
 from textwrap import fill
 from PyQt5.QtWidgets import (
-    QApplication, QTableView, QVBoxLayout, QLineEdit, QPushButton, QWidget, QHBoxLayout, QHeaderView, QAbstractItemView, QDialog
+    QApplication, QTableView, QVBoxLayout, QLineEdit, QPushButton, QWidget, QHBoxLayout, QHeaderView, QAbstractItemView,
+    QProgressBar, QInputDialog
 )
-from PyQt5.QtCore import Qt, QSortFilterProxyModel, QPoint, QSize
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QIcon, QMouseEvent, QPalette, QBrush, QPixmap, QColor
+from PyQt5.QtCore import Qt, QSortFilterProxyModel, QPoint, QSize, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QIcon, QMouseEvent
 
-from helpers.folder_patterns import generate_folder_patterns
+from helpers.background import apply_background, random_background_path
 from helpers.messages_dialog import confirm_message, show_message
-from helpers.pin_request import PinDialog
-from model.json_logic import load_db, save_db, load_settings_data
-from plus import AddToDatabaseWindow
+from helpers.settings_service import settings_service
+from model.json_logic import STORE_ERRORS, delete_records, iter_db_entries, load_db, update_records
+from model.records import ID_FIELD
+from model.table_model import PRIORITY_HEADERS, DeviceTableModel
+# plus, helpers.pin_request and the folder helpers are imported on first use, they aren't needed to show the window
 
-import random
+mark_startup("imports")
+
+
+# Quiet time after the last keystroke before the filter runs
+FILTER_DEBOUNCE_MS = 150
+# Quiet time after the last resize event before the background is smoothly rescaled
+RESIZE_DEBOUNCE_MS = 150
+# Entries handed from the loader thread to the table per signal
+LOAD_BATCH_SIZE = 2000
+
+
+class FilterSignals(QObject):
+    """Carries filter results from the worker thread back to the UI thread"""
+    finished = pyqtSignal(int, int, str, object)
+
+
+class FilterTask(QRunnable):
+    """Runs one search index query on a worker thread"""
+    def __init__(self, generation, latest_generation, index, text, candidates, signals):
+        super().__init__()
+        self.generation = generation
+        self.latest_generation = latest_generation
+        # A snapshot, the table keeps changing the live index while this runs
+        self.index = index.snapshot()
+        self.version = index.version
+        self.text = text
+        self.candidates = candidates
+        self.signals = signals
+
+    def run(self):
+        # A newer request was queued meanwhile, nobody will look at this result
+        if self.generation != self.latest_generation():
+            return
+        try:
+            keys = self.index.search(self.text, candidates=self.candidates)
+        except Exception as e:
+            # An exception escaping run() would take the whole application down
+            print(f"ERROR: Background filter failed, filtering on the UI thread instead: {e}")
+            keys = None
+        self.signals.finished.emit(self.generation, self.version, self.text, keys)
+
+
+class LoaderSignals(QObject):
+    """Carries decoded entries from the loader thread to the UI thread"""
+    batch_loaded = pyqtSignal(int, object, float)
+    # generation, success, whether every entry already had its record ID
+    finished = pyqtSignal(int, bool, bool)
+
+
+class DatabaseLoadTask(QRunnable):
+    """Decodes the database on a worker thread and hands the entries over in batches"""
+    def __init__(self, generation, latest_generation, signals):
+        super().__init__()
+        self.generation = generation
+        self.latest_generation = latest_generation
+        self.signals = signals
+
+    def run(self):
+        batch = []
+        progress = 0.0
+        has_ids = True
+        try:
+            for brand, entry, progress in iter_db_entries():
+                has_ids = has_ids and bool(entry.get(ID_FIELD))
+                batch.append((brand, entry))
+                if len(batch) >= LOAD_BATCH_SIZE:
+                    # The load was restarted or replaced, stop decoding
+                    if self.generation != self.latest_generation():
+                        return
+                    self.signals.batch_loaded.emit(self.generation, batch, progress)
+                    batch = []
+        except Exception as e:
+            # Unexpected layout, a locked SQLite database, an unreadable log...
+            # an exception escaping run() would take the whole application down
+            print(f"ERROR: Unable to stream the database: {e}")
+            self.signals.finished.emit(self.generation, False, has_ids)
+            return
+        if batch:
+            self.signals.batch_loaded.emit(self.generation, batch, progress)
+        self.signals.finished.emit(self.generation, True, has_ids)
 
 
 class CustomFilterProxyModel(QSortFilterProxyModel):
@@ -21,22 +105,80 @@ class CustomFilterProxyModel(QSortFilterProxyModel):
         super().__init__(parent)
         self.drag_position = QPoint()
         self.filter_string = ""
+        # Matching row keys for filter_string, tagged with the index version they came from
+        self.accepted_keys = None
+        self.accepted_version = None
+        # Background filtering, only the result of the latest request is applied
+        self.generation = 0
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.filter_signals = FilterSignals(self)
+        self.filter_signals.finished.connect(self.filter_finished)
+
+    def refinement_candidates(self, text):
+        """Rows worth testing for text, or None when every row has to be tested"""
+        index = self.sourceModel().search_index
+        if (self.accepted_keys is not None and self.accepted_version == index.version
+                and self.filter_string.split() and text.startswith(self.filter_string)):
+            # The query only grew, so its matches are a subset of the previous ones: re-test just those
+            return self.accepted_keys
+        # Deleted or replaced text (or changed data) needs a full pass
+        return None
 
     def setFilterString(self, text):
-        self.filter_string = text.lower()
+        text = text.lower()
+        candidates = self.refinement_candidates(text)
+        if candidates is not None:
+            self.accepted_keys = self.sourceModel().search_index.search(text, candidates=candidates)
+        else:
+            self.accepted_keys = None
+        self.filter_string = text
         self.invalidateFilter()
- 
+
+    def request_filter(self, text):
+        """Compute the matches for text on a worker thread and apply them when ready"""
+        self.generation += 1
+        text = text.lower()
+        if not text.split():
+            # Nothing to search for, clearing the filter is instant
+            self.setFilterString(text)
+            return
+        task = FilterTask(
+            self.generation, lambda: self.generation, self.sourceModel().search_index,
+            text, self.refinement_candidates(text), self.filter_signals
+        )
+        self.thread_pool.start(task)
+
+    def filter_finished(self, generation, version, text, keys):
+        if generation != self.generation:
+            return  # Stale, the user kept typing
+        if keys is None:
+            # The background search failed, answer it here instead
+            self.setFilterString(text)
+            return
+        if version != self.sourceModel().search_index.version:
+            # The data changed while searching, run the query again against the new rows
+            self.request_filter(text)
+            return
+        self.filter_string = text
+        self.accepted_keys = keys
+        self.accepted_version = version
+        self.invalidateFilter()
+
+    def matching_keys(self):
+        """Answer the filter from the source model's search index, recomputed only when stale"""
+        index = self.sourceModel().search_index
+        if self.accepted_keys is None or self.accepted_version != index.version:
+            self.accepted_keys = index.search(self.filter_string)
+            self.accepted_version = index.version
+        return self.accepted_keys
+
     def filterAcceptsRow(self, source_row, source_parent):
         """Method to check if a row meets the filter criteria"""
-        # Access the source model
-        model = self.sourceModel()        
-        # Concatenate all column data from the row into a single lowercase string
-        row_data = " ".join(
-            model.data(model.index(source_row, col, source_parent)) or "" 
-            for col in range(model.columnCount())
-        ).lower()
-        # Check if all words/letters from the filter string are present in the row data
-        return all(word in row_data for word in self.filter_string.split())
+        if not self.filter_string.split():
+            return True
+        # All words/letters from the filter string must be present in the row data
+        return self.sourceModel().row_key(source_row) in self.matching_keys()
 
 class DataViewApp(QWidget):
     def __init__(self):
@@ -44,16 +186,24 @@ class DataViewApp(QWidget):
         self.init_ui()
 
     def init_ui(self):
+        # Settings kept in memory, reloaded only when settings.json changes
+        self.settings = settings_service()
         self.setWindowFlags(Qt.Window)
         self.setWindowTitle("Images DB")
         self.setGeometry(100, 100, 800, 600)
         self.setWindowIcon(QIcon("assets/icons/icon.ico"))
-        self.set_background_image(f"assets/image/background-{random.randint(1, 4)}.png")
+        # One background per window, decoded once and rescaled when the size settles
+        self.background_path = random_background_path()
+        self.background_timer = QTimer(self)
+        self.background_timer.setSingleShot(True)
+        self.background_timer.setInterval(RESIZE_DEBOUNCE_MS)
+        self.background_timer.timeout.connect(lambda: self.set_background_image(self.background_path))
+        self.set_background_image(self.background_path)
 
         main_layout = QVBoxLayout()
         main_layout.addLayout(self.create_topbar())
 
-        self.model = QStandardItemModel()
+        self.model = DeviceTableModel()
         self.proxy_model = CustomFilterProxyModel()
         self.proxy_model.setSourceModel(self.model)
 
@@ -62,14 +212,34 @@ class DataViewApp(QWidget):
         self.setup_table_view(self.table_view)
         # Connect cell click signal
         self.table_view.doubleClicked.connect(self.cell_double_clicked)
+        # Brand folder listings for cell_double_clicked, see get_folder_index
+        self.folder_index = None
+        # Reused by every edit, see edit_selected_entry
+        self.edit_window = None
 
         main_layout.addWidget(self.table_view)
 
         self.setLayout(main_layout)
-        self.load_data_GUI()
+
+        # Progressive loading, the loader thread decodes and fetchMore moves batches into the table
+        self.load_generation = 0
+        self.loading_finished = True
+        # Own pool, Qt uses the global one internally (e.g. for smooth pixmap scaling)
+        self.thread_pool = QThreadPool(self)
+        self.loader_signals = LoaderSignals(self)
+        self.loader_signals.batch_loaded.connect(self.stream_batch_loaded)
+        self.loader_signals.finished.connect(self.stream_finished)
+        self.fetch_timer = QTimer(self)
+        self.fetch_timer.setInterval(0)
+        self.fetch_timer.timeout.connect(self.fetch_pending_rows)
+        # Starts once the event loop runs, so the empty window paints first
+        QTimer.singleShot(0, self.stream_data_GUI)
+        mark_startup("window built")
 
     def resizeEvent(self, event):
-        self.set_background_image(f"assets/image/background-{random.randint(1, 4)}.png")
+        # Cheap preview while the window is being dragged, the smooth rescale runs once it settles
+        self.set_background_image(self.background_path, fast=True)
+        self.background_timer.start()
         super().resizeEvent(event)
 
     def create_topbar(self):
@@ -87,10 +257,28 @@ class DataViewApp(QWidget):
         self.add_button = self.create_icon_button("add.svg", "Add New Entry", self.open_add_window)
         topbar_layout.addWidget(self.add_button)
 
+        # Adds a column telling whether each device has an image folder
+        self.folders_button = self.create_button("Check Folders", "green", self.toggle_folder_column, (120, 54))
+        self.folders_button.setCheckable(True)
+        topbar_layout.addWidget(self.folders_button)
+
+        # Shown while the database is streaming in
+        self.load_progress = QProgressBar()
+        self.load_progress.setFixedSize(120, 54)
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setToolTip("Loading database...")
+        self.load_progress.hide()
+        topbar_layout.addWidget(self.load_progress)
+
         self.filter_input = QLineEdit(placeholderText="Type to filter...")
         self.filter_input.setFixedHeight(54)
         self.filter_input.setStyleSheet("font-size: 30px;")
-        self.filter_input.textChanged.connect(self.apply_filter)
+        # Coalesce keystrokes, the filter runs once typing pauses
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DEBOUNCE_MS)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_input.textChanged.connect(self.filter_timer.start)
         topbar_layout.addWidget(self.filter_input)
 
         return topbar_layout
@@ -143,133 +331,232 @@ class DataViewApp(QWidget):
         header = table_view.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Stretch)
         table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
-        table_view.setSelectionMode(QAbstractItemView.SingleSelection) # Ensure that QTableView is in single-selection mode
+        # Ctrl/Shift select several rows, edit and delete then work on all of them at once
+        table_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
         header.setStretchLastSection(True)
-        table_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        # Uniform row height, ResizeToContents measured every row after each reset or filter change
+        table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
     def load_data_GUI(self):
-        self.model.clear()
-        data = load_db()
-        # Define the priority headers
-        priority_headers = ["Brand", "Model", "Type"]
-
-        # Collect all unique keys from the data, excluding the priority headers
-        additional_headers = sorted(
-            {key for items in data.values() for item in items for key in item.keys()} - set(priority_headers)
+        # Cancel a progressive load still running, the diff below covers every row
+        self.load_generation += 1
+        self.loading_finished = True
+        self.fetch_timer.stop()
+        self.load_progress.hide()
+        try:
+            data = load_db()
+        except STORE_ERRORS as e:
+            # Locked by a command line import, or unreachable: keep showing what we have
+            print(f"ERROR: Unable to load the database: {e}")
+            show_message("critical", "Error", f"Unable to read the database, it may be in use. Please try again.\n\n{e}")
+            return
+        # Only the rows that changed since the last load are touched
+        self.model.update_database(data)
+        self.prefetch_brand_folders()
+        self.check_folders()
+
+    def stream_data_GUI(self):
+        """Load the database progressively: decoded on a worker thread, shown batch by batch."""
+        self.load_generation += 1
+        self.loading_finished = False
+        self.model.begin_streaming()
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        task = DatabaseLoadTask(self.load_generation, lambda: self.load_generation, self.loader_signals)
+        self.thread_pool.start(task)
+
+    def stream_batch_loaded(self, generation, entries, progress):
+        if generation != self.load_generation:
+            return
+        self.model.queue_entries(entries)
+        self.load_progress.setValue(int(progress * 100))
+        self.fetch_timer.start()
+
+    def fetch_pending_rows(self):
+        """One fetchMore batch per event loop pass, so the window stays responsive while rows arrive."""
+        if self.model.canFetchMore():
+            self.model.fetchMore()
+        if not self.model.canFetchMore():
+            self.fetch_timer.stop()
+            if self.loading_finished:
+                self.stream_completed()
+
+    def stream_finished(self, generation, success, has_ids):
+        if generation != self.load_generation:
+            return
+        if not success or not has_ids:
+            # Unexpected file layout, load it in one go instead. Entries without a record ID
+            # get theirs from load_db, here on the UI thread and against the current file.
+            self.load_data_GUI()
+            self.data_loaded()
+            return
+        self.loading_finished = True
+        if not self.model.canFetchMore():
+            self.stream_completed()
+
+    def stream_completed(self):
+        """Every streamed row is in the table."""
+        self.load_progress.hide()
+        self.data_loaded()
+        self.prefetch_brand_folders()
+        self.check_folders()
+
+    def data_loaded(self):
+        """The database is shown, streamed or loaded in one go: the end of the startup profile."""
+        mark_startup("data loaded")
+        report_startup()
+
+    def prefetch_brand_folders(self):
+        """Index every brand folder of every location in the background so double-clicks are memory lookups."""
+        self.get_folder_index().prefetch(
+            os.path.join(location, brand.strip()) for location in self.settings.locations() for brand in self.model.brands()
         )
 
-        # Combine priority headers with additional headers
-        ordered_headers = priority_headers + additional_headers
-
-        self.model.setHorizontalHeaderLabels(ordered_headers)
-        # Populate rows in the model
-        for brand, items in data.items():
-            for item in items:
-                row = []
-                for header in ordered_headers:
-                    value = str(item.get(header, brand if header == "Brand" else ""))
-                    # Create a QStandardItem for each cell, better for custom profiles
-                    item_cell = QStandardItem(value)
-                    item_cell.setTextAlignment(Qt.AlignCenter)
-                    # Make cells non-editable
-                    item_cell.setFlags(item_cell.flags() & ~Qt.ItemIsEditable)
-                    # Apply conditional formatting for the 'Image' column
-                    if header == "Image":
-                        if value == "DONE":
-                            item_cell.setBackground(QColor("#5f8244"))
-                        else:
-                            item_cell.setBackground(QColor("#bd4613"))
-                    row.append(item_cell)
-                self.model.appendRow(row)
+    def get_folder_index(self):
+        """Create the folder index the first time a folder is looked up."""
+        if self.folder_index is None:
+            from helpers.folder_index import FolderIndex
+
+            self.folder_index = FolderIndex(self)
+            self.folder_index.folders_resolved.connect(self.model.update_folder_status)
+        return self.folder_index
+
+    def toggle_folder_column(self, checked):
+        self.model.set_folder_column_visible(checked)
+        self.check_folders()
+
+    def check_folders(self):
+        """Resolve the folder of every row in parallel, the column fills in brand by brand."""
+        if not self.model.folder_column_visible():
+            return
+        self.get_folder_index().resolve_all(self.settings.locations(), self.model.devices())
+
+    def selected_rows(self):
+        """Source model rows of the selected table rows, in view order."""
+        return [self.proxy_model.mapToSource(index).row() for index in self.table_view.selectionModel().selectedRows()]
+
+    def unlock(self):
+        """Ask for the PIN unless it was entered moments ago. Tells the user when it is refused."""
+        from helpers.pin_request import unlock_pin
+
+        if unlock_pin(self.settings.pin_unlock_seconds(), self):
+            return True
+        show_message("critical", "Access Denied", "Invalid PIN. Action canceled.")
+        return False
+
+    def describe_rows(self, rows, limit=10):
+        """Brand, Model and Type of the first rows, for confirmation messages."""
+        lines = [" ".join(self.model.row_data(row)[header] for header in PRIORITY_HEADERS) for row in rows[:limit]]
+        if len(rows) > limit:
+            lines.append(f"... and {len(rows) - limit} more")
+        return "\n".join(lines)
 
     def edit_selected_entry(self):
         """
         Opens AddToDatabaseWindow populated with the selected row's values.
+        With several rows selected, one field is set on all of them instead.
         """
-        # Ensure the correct selection is retrieved
-        selected_index = self.table_view.currentIndex()
-        if not selected_index.isValid():
+        rows = self.selected_rows()
+        if not rows:
             show_message("warning", "No Selection", "Please select an entry to edit.")
             return
 
-        # Show PIN dialog before proceeding
-        pin_dialog = PinDialog()
-        if pin_dialog.exec_() != QDialog.Accepted:  
-            show_message("critical", "Access Denied", "Invalid PIN. Action canceled.")
+        # Show PIN dialog before proceeding, unless it was entered moments ago
+        if not self.unlock():
+            return
+
+        if len(rows) > 1:
+            self.edit_selected_entries(rows)
             return
 
         # Extract row data
-        source_index = self.table_view.model().mapToSource(selected_index)
-        row_index = source_index.row()
-        headers = [self.model.headerData(col, Qt.Horizontal) for col in range(self.model.columnCount())]
-        item_data = {
-            header: (self.model.item(row_index, col).text() if self.model.item(row_index, col) else "")
-            for col, header in enumerate(headers)
-        }
+        item_data = self.model.row_data(rows[0])
 
         # Debugging: Log the extracted data
         #print(f"Row Index: {row_index}, Item Data: {item_data}")
 
-        # Create a new instance of AddToDatabaseWindow and populate fields
-        self.edit_window = AddToDatabaseWindow()
-        self.edit_window.brand_combobox.setCurrentText(item_data.get("Brand", ""))
-        self.edit_window.model_entry.setText(item_data.get("Model", ""))
-        self.edit_window.type_combobox.setCurrentText(item_data.get("Type", ""))
-        self.edit_window.windows_version_combobox.setCurrentText(item_data.get("Windows Version", ""))
-        self.edit_window.image_combobox.setCurrentText(item_data.get("Image", ""))
+        # One editor window, built on the first edit, hidden between edits and refilled each time
+        if self.edit_window is None:
+            from plus import AddToDatabaseWindow
+
+            self.edit_window = AddToDatabaseWindow()
+            # Refresh data and hide the window after a successful edit
+            self.edit_window.data_added_signal.connect(self.edit_window.hide)
+            self.edit_window.data_added_signal.connect(self.load_data_GUI)
+        # Saving changes this record only, even if its Model or Type is edited
+        self.edit_window.populate(item_data, self.model.row_id(rows[0]))
 
         # Show the edit window
         self.edit_window.show()
+        self.edit_window.raise_()
+        self.edit_window.activateWindow()
+
+    def edit_selected_entries(self, rows):
+        """Set one field to the same value on every selected entry, with a single write."""
+        fields = [header for header in self.model.headers() if header not in PRIORITY_HEADERS]
+        if not fields:
+            return
+        field, accepted = QInputDialog.getItem(
+            self, "Edit Entries", f"Field to change on {len(rows)} entries:", fields, 0, False
+        )
+        if not accepted:
+            return
+        values = sorted(self.model.distinct_values(field) - {""})
+        value, accepted = QInputDialog.getItem(self, "Edit Entries", f"New {field}:", values, 0, True)
+        # Upper case, like everything entered through AddToDatabaseWindow
+        value = value.strip().upper()
+        if not accepted or not value:
+            return
+
+        if not confirm_message("Edit Entries", f"Set {field} to '{value}' on {len(rows)} entries?\n\n{self.describe_rows(rows)}"):
+            return
+
+        updated = update_records({self.model.row_id(row): (None, {field: value}) for row in rows})
+        if updated is None:
+            show_message("critical", "Error", "Unable to save the database, it may be in use. Please try again.")
+            return
+        self.load_data_GUI()
+        show_message("information", "Success", f"{updated} entries updated successfully!")
 
-        # Refresh data and close window after successful edit
-        self.edit_window.data_added_signal.connect(self.edit_window.close)
-        self.edit_window.data_added_signal.connect(self.edit_window.deleteLater)
-        self.edit_window.data_added_signal.connect(self.load_data_GUI)
-    
     def delete_selected_entry(self):
-        selected_index = self.table_view.currentIndex()
-        if not selected_index.isValid():
+        rows = self.selected_rows()
+        if not rows:
             show_message("warning", "No Selection", "Please select an entry to delete.")
             return
         
-        # Show PIN dialog before proceeding
-        pin_dialog = PinDialog()
-        if pin_dialog.exec_() != QDialog.Accepted: 
-            show_message("critical", "Access Denied", "Invalid PIN. Action canceled.")
+        # Show PIN dialog before proceeding, unless it was entered moments ago
+        if not self.unlock():
             return
 
-        # Extract row data using source mapping
-        source_index = self.table_view.model().mapToSource(selected_index)
-        row_index = source_index.row()
-        brand = self.model.item(row_index, 0).text()
-        headers = [self.model.headerData(col, Qt.Horizontal) for col in range(self.model.columnCount())]
-
-        item_data = {
-            header: (self.model.item(row_index, col).text() if self.model.item(row_index, col) else "")
-            for col, header in enumerate(headers)
-            if header != "Brand"
-        }
-
-        formatted_data = "\n".join(f"{key}: {value}" for key, value in item_data.items())
+        if len(rows) == 1:
+            item_data = self.model.row_data(rows[0])
+            brand = item_data.pop("Brand")
+            formatted_data = "\n".join(f"{key}: {value}" for key, value in item_data.items())
+            message = f"Are you sure you want to delete this entry?\n\nBrand: {brand}\n\n{formatted_data}"
+        else:
+            message = f"Are you sure you want to delete these {len(rows)} entries?\n\n{self.describe_rows(rows)}"
 
-        if not confirm_message("Delete Entry", f"Are you sure you want to delete this entry?\n\nBrand: {brand}\n\n{formatted_data}"):
+        if not confirm_message("Delete Entry", message):
             return
 
-        data = load_db()
-        if brand in data:
-            data[brand] = [entry for entry in data[brand] if not all(str(entry.get(k, "")) == v for k, v in item_data.items())]
-            if not data[brand]:
-                del data[brand]
-
-        save_db(data)
+        # Only the selected records, identical rows are left alone; one write for all of them
+        deleted = delete_records([self.model.row_id(row) for row in rows])
+        if deleted is None:
+            show_message("critical", "Error", "Unable to save the database, it may be in use. Please try again.")
+            return
         self.load_data_GUI()
-        show_message("information", "Success", "Entry deleted successfully!")
+        if deleted == 1:
+            show_message("information", "Success", "Entry deleted successfully!")
+        else:
+            show_message("information", "Success", f"{deleted} entries deleted successfully!")
 
     def apply_filter(self):
-        self.proxy_model.setFilterString(self.filter_input.text())
+        self.proxy_model.request_filter(self.filter_input.text())
 
     def open_add_window(self):
         if not hasattr(self, 'add_window') or self.add_window is None: # Allow just one instance 
+            from plus import AddToDatabaseWindow
+
             self.add_window = AddToDatabaseWindow()
             self.add_window.setAttribute(Qt.WA_DeleteOnClose)  # Ensure window is deleted on close
             self.add_window.data_added_signal.connect(self.load_data_GUI)
@@ -283,18 +570,8 @@ class DataViewApp(QWidget):
         """Clear the instance of add_window when it is closed."""
         self.add_window = None
 
-    def set_background_image(self, image_path):
-        palette = QPalette()
-        pixmap = QPixmap(image_path)
-
-        if pixmap.isNull():
-            random_color = QColor(*(random.randint(0, 255) for _ in range(3)))
-            palette.setColor(QPalette.Background, random_color)
-        else:
-            scaled_pixmap = pixmap.scaled(self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-            palette.setBrush(QPalette.Background, QBrush(scaled_pixmap))
-
-        self.setPalette(palette)
+    def set_background_image(self, image_path, fast=False):
+        apply_background(self, image_path, fast)
 
     def create_button(self, text, color, action, fixed_size=None):
         button = QPushButton(text)
@@ -340,10 +617,7 @@ class DataViewApp(QWidget):
         source_index = self.proxy_model.mapToSource(index)
 
         # Extract row data
-        row_data = {
-            self.model.headerData(col, Qt.Horizontal): self.model.item(source_index.row(), col).text().strip()
-            for col in range(self.model.columnCount())
-        }
+        row_data = {header: value.strip() for header, value in self.model.row_data(source_index.row()).items()}
 
         # Validate required fields
         brand, model, device_type = row_data.get("Brand"), row_data.get("Model"), row_data.get("Type")
@@ -351,38 +625,35 @@ class DataViewApp(QWidget):
             show_message("warning", "Error", "Brand, Model, or Type is missing.")
             return
 
-        # Load main location from settings
-        location = list(load_settings_data()["Settings"]["Location"].keys())[0]
+        # Every location is searched at once, the first one in the settings wins
+        self.get_folder_index().locate(
+            self.settings.locations(), brand, model, device_type,
+            lambda path, outcomes: self.open_device_folder(path, outcomes, brand, model, device_type)
+        )
+
+    def open_device_folder(self, folder_path, outcomes, brand, model, device_type):
+        """Open the folder found by cell_double_clicked or show why there is none."""
+        from helpers.folder_index import ROOT_MISSING, ROOT_TIMED_OUT
 
-        folder_patterns = generate_folder_patterns(brand, model, device_type)
-        # Open the first existing folder or show an error
-        # Search for the first matching folder
         try:
-        # List all directories in the target path
-            brand_folder = os.path.join(location, brand)
-            if not os.path.exists(brand_folder):
-                show_message("warning","Not found.", f"{brand} folder not found.")
+            if folder_path:
+                os.startfile(folder_path)
+                print(f"DEBUG: Folder '{folder_path}' opened successfully.")
+                return
+
+            unreachable = [root for root, outcome in outcomes.items() if outcome == ROOT_TIMED_OUT]
+            note = f"\n\nNot reachable: {', '.join(unreachable)}" if unreachable else ""
+            if all(outcome in (ROOT_MISSING, ROOT_TIMED_OUT) for outcome in outcomes.values()):
+                show_message("warning","Not found.", f"{brand} folder not found.{note}")
                 return
-            
-            '''dictionary where keys are lowercase folder names and values are original folder names'''
-            available_folders = {folder.lower(): folder for folder in os.listdir(brand_folder) if os.path.isdir(os.path.join(brand_folder, folder))}
-
-            # Search for the first matching folder
-            for pattern in folder_patterns:
-                normalized_pattern = pattern.lower()
-                if normalized_pattern in available_folders:
-                    folder_path = os.path.join(brand_folder, available_folders[normalized_pattern])
-                    os.startfile(folder_path)
-                    print(f"DEBUG: Folder '{folder_path}' opened successfully.")
-                    return
             '''
             textwrap.fill() automatically breaks the lines at the specified width 80 characters).
             ''' 
-            formatted_paths = ", ".join(f"'{path}'" for path in folder_patterns)
-            show_message("warning","Folder Not Found",f"No folder found for:\n {fill(formatted_paths, width=120)}")
+            names = [f"{brand} {model} {device_type}", f"{brand} {model}", f"{model} {device_type}", model]
+            formatted_paths = ", ".join(f"'{path}'" for path in names) + " (ignoring case, '#', '_' and spaces)"
+            show_message("warning","Folder Not Found",f"No folder found for:\n {fill(formatted_paths, width=120)}{note}")
             print(f"No folder found at:\n{fill(formatted_paths, width=80)}") 
 
-            
         # Show error if no folder exists
         except Exception as e:
             print(f"ERROR: An unexpected error occurred: {e}")
@@ -401,6 +672,7 @@ if __name__ == "__main__":
     app = QApplication([])
     window = DataViewApp()
     window.show()
+    mark_startup("window shown")
     app.exec_()
 
     ''' App start with PIN '''
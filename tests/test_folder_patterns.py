@@ -0,0 +1,35 @@
+import unittest
+
+from helpers.folder_patterns import build_folder_index, generate_folder_patterns, match_folder
+
+
+def match(folder_names, brand="HP", model="840 G3", device_type="Laptop"):
+    return match_folder(build_folder_index(folder_names), brand, model, device_type)
+
+
+class MatchFolderTest(unittest.TestCase):
+    def test_documented_priority(self):
+        # Brand+model+type, brand+model, model+type, model alone
+        folders = ["HP 840 G3 Laptop", "HP_840 G3", "840 G3 Laptop", "840 G3"]
+        for expected in list(folders):
+            self.assertEqual(match(folders), expected)
+            folders.remove(expected)
+        self.assertIsNone(match(folders))
+
+    def test_folder_without_hash_comes_before_any_hash_one(self):
+        self.assertEqual(match(["#HP 840 G3 Laptop", "840 G3"]), "840 G3")
+        self.assertEqual(match(["#HP 840 G3 Laptop", "#840 G3"]), "#HP 840 G3 Laptop")
+
+    def test_every_generated_pattern_is_found(self):
+        for pattern in generate_folder_patterns("HP", "840 G3", "Laptop"):
+            self.assertEqual(match([pattern, "Other"]), pattern)
+
+    def test_case_spaces_and_underscores_are_ignored(self):
+        self.assertEqual(match(["hp_840g3_LAPTOP_"]), "hp_840g3_LAPTOP_")
+
+    def test_other_devices_do_not_match(self):
+        self.assertIsNone(match(["HP 840 G5 Laptop", "850 G3", "Dell 840 G3"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
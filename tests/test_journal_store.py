@@ -0,0 +1,112 @@
+import builtins
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from model.journal_store import JournalStore
+
+
+def entry(model, image="NOT DONE"):
+    return {"Model": model, "Type": "Laptop", "Image": image}
+
+
+class JournalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.folder.name, "db.snapshot.json")
+        self.log_path = os.path.join(self.folder.name, "db.log")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def store(self):
+        return JournalStore(self.snapshot_path, self.log_path)
+
+    def models(self, store):
+        return sorted(item["Model"] for item in store.load().get("HP", []))
+
+
+class JournalCrashRecoveryTest(JournalTestCase):
+    def test_torn_newline_keeps_every_acknowledged_record(self):
+        store = self.store()
+        store.upsert("HP", entry("840 G3"))
+        # Crash after the record was written but before its newline
+        with open(self.log_path, "rb+") as file:
+            file.truncate(os.path.getsize(self.log_path) - 1)
+
+        store = self.store()
+        self.assertEqual(self.models(store), ["840 G3"])
+        store.upsert("HP", entry("850 G5"))
+        self.assertEqual(self.models(self.store()), ["840 G3", "850 G5"])
+
+    def test_torn_record_is_cut_off(self):
+        store = self.store()
+        store.upsert("HP", entry("840 G3"))
+        with open(self.log_path, "a") as file:
+            file.write('{"op": "upsert", "brand": "HP", "ent')
+
+        store = self.store()
+        self.assertEqual(self.models(store), ["840 G3"])
+        store.upsert("HP", entry("850 G5"))
+        self.assertEqual(self.models(self.store()), ["840 G3", "850 G5"])
+
+    def test_read_only_log_still_loads(self):
+        store = self.store()
+        store.upsert("HP", entry("840 G3"))
+        with open(self.log_path, "rb+") as file:
+            file.truncate(os.path.getsize(self.log_path) - 1)
+
+        real_open = builtins.open
+
+        def read_only_open(path, mode="r", *args, **kwargs):
+            if path == self.log_path and mode != "rb":
+                raise PermissionError(f"Read-only: {path}")
+            return real_open(path, mode, *args, **kwargs)
+
+        with mock.patch("builtins.open", read_only_open):
+            self.assertEqual(self.models(self.store()), ["840 G3"])
+
+
+class JournalMigrationTest(JournalTestCase):
+    def test_json_database_seeds_the_snapshot(self):
+        json_path = os.path.join(self.folder.name, "db.json")
+        with open(json_path, "w") as file:
+            json.dump({"HP": [entry("840 G3")]}, file)
+
+        self.assertTrue(self.store().migrate_from_json(json_path))
+        self.assertEqual(self.models(self.store()), ["840 G3"])
+        # Only the first time
+        self.assertFalse(self.store().migrate_from_json(json_path))
+
+
+class JournalSharedLogTest(JournalTestCase):
+    def test_writes_of_two_processes_are_all_kept(self):
+        first, second = self.store(), self.store()
+        first.upsert("HP", entry("840 G3"))
+        second.upsert("HP", entry("850 G5"))
+        first.upsert("HP", entry("860 G9"))
+        self.assertEqual(self.models(self.store()), ["840 G3", "850 G5", "860 G9"])
+        self.assertEqual(self.models(first), ["840 G3", "850 G5", "860 G9"])
+
+    def test_change_from_another_process_is_seen_before_updating(self):
+        first, second = self.store(), self.store()
+        first.upsert("HP", entry("840 G3"))
+        # Updates the record the other process added instead of adding a second one
+        self.assertTrue(second.upsert("HP", entry("840 G3", "DONE")))
+        record_id = next(iter(first.index()))
+        self.assertEqual(first.update_records({record_id: (None, {"Image": "DONE"})}), 1)
+        self.assertEqual(second.delete_records([record_id]), 1)
+        self.assertEqual(self.models(self.store()), [])
+
+    def test_records_logged_with_the_same_seq_are_both_replayed(self):
+        # Two processes that appended at the same moment, before either saw the other's record
+        with open(self.log_path, "w") as file:
+            for model in ("840 G3", "850 G5"):
+                file.write(json.dumps({"op": "upsert", "brand": "HP", "entry": entry(model), "seq": 1}) + "\n")
+        self.assertEqual(self.models(self.store()), ["840 G3", "850 G5"])
+
+
+if __name__ == "__main__":
+    unittest.main()
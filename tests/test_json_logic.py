@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from model import json_logic
+from model.json_logic import iter_json_entries, upsert_entries
+from model.records import ID_FIELD
+
+
+class IterJsonEntriesTest(unittest.TestCase):
+    def entries(self, text):
+        return [(brand, entry["Model"]) for brand, entry, _ in iter_json_entries(text)]
+
+    def test_entries_come_out_in_file_order(self):
+        data = {"HP": [{"Model": "840 G3"}, {"Model": "800 G3"}], "Dell": [{"Model": "7040"}]}
+        text = json.dumps(data, indent=4)
+        self.assertEqual(self.entries(text), [("HP", "840 G3"), ("HP", "800 G3"), ("Dell", "7040")])
+        progress = [progress for _, _, progress in iter_json_entries(text)]
+        self.assertEqual(progress, sorted(progress))
+        self.assertTrue(0 < progress[0] and progress[-1] <= 1)
+
+    def test_empty_brands_and_databases(self):
+        self.assertEqual(self.entries('{"HP": [], "Dell": [{"Model": "7040"}], "Fujitsu": []}'), [("Dell", "7040")])
+        self.assertEqual(self.entries(" { } "), [])
+
+    def test_other_layouts_are_refused(self):
+        for text in ("[]", '{"HP": {}}', '{"HP": [{"Model": "840 G3"}', '{"HP": [{"Model": "840 G3"} {}]}', ""):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                self.entries(text)
+
+
+class UpsertEntriesTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        db_file = os.path.join(self.folder.name, "database", "local_database.json")
+        for patcher in (
+            mock.patch.object(json_logic, "db_file", db_file),
+            mock.patch.object(json_logic, "_storage_engine", "json"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        json_logic.invalidate_db_cache()
+        self.addCleanup(json_logic.invalidate_db_cache)
+        json_logic.save_db({"HP": [{ID_FIELD: "a", "Model": "840 G3", "Type": "LAPTOP", "Image": "NOT DONE"}]})
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_batch_is_matched_against_the_database_and_itself(self):
+        summary = upsert_entries([
+            ("hp", {"Model": " 840 g3", "Type": "laptop", "Image": "DONE"}),
+            ("Dell", {"Model": "7040", "Type": "SFF", ID_FIELD: "taken"}),
+            ("DELL ", {"Model": "7040", "Type": "sff", "Image": "DONE"}),
+        ])
+        self.assertEqual(summary["inserted"], [("Dell", "7040", "SFF")])
+        self.assertEqual(summary["updated"], [("HP", "840 G3", "LAPTOP"), ("Dell", "7040", "SFF")])
+
+        data = json_logic.load_db()
+        self.assertEqual(sorted(data), ["Dell", "HP"])
+        self.assertEqual(data["HP"], [{ID_FIELD: "a", "Model": "840 G3", "Type": "LAPTOP", "Image": "DONE"}])
+        (dell,) = data["Dell"]
+        self.assertEqual(dell["Image"], "DONE")
+        self.assertNotEqual(dell[ID_FIELD], "taken")
+
+    def test_existing_entries_are_kept_without_overwrite(self):
+        summary = upsert_entries([("HP", {"Model": "840 G3", "Type": "Laptop", "Image": "DONE"})], overwrite=False)
+        self.assertEqual(summary, {"inserted": [], "updated": [], "conflicts": [("HP", "840 G3", "LAPTOP")]})
+        self.assertEqual(json_logic.load_db()["HP"][0]["Image"], "NOT DONE")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from model.records import (
+    ID_FIELD, brand_spelling, find_record, merge_records, record_index, remove_records
+)
+
+
+def database():
+    return {
+        "HP": [
+            {ID_FIELD: "a", "Model": "840 G3", "Type": "LAPTOP", "Image": "DONE"},
+            {ID_FIELD: "b", "Model": "800 G3", "Type": "MINI", "Image": "NOT DONE"},
+        ],
+        "DELL": [{ID_FIELD: "c", "Model": "7040", "Type": "SFF", "Image": "NOT DONE"}],
+    }
+
+
+class MergeRecordsTest(unittest.TestCase):
+    def test_fields_are_merged_in_place(self):
+        data = database()
+        self.assertEqual(merge_records(data, {"b": (None, {"Image": "DONE"})}), 1)
+        self.assertEqual(data["HP"][1]["Image"], "DONE")
+        self.assertEqual([entry[ID_FIELD] for entry in data["HP"]], ["a", "b"])
+
+    def test_record_moves_to_another_brand_and_keeps_its_id(self):
+        data = database()
+        index = record_index(data)
+        changed = merge_records(data, {"c": ("HP", {"Model": "7050", ID_FIELD: "x"})}, index)
+
+        self.assertEqual(changed, 1)
+        self.assertNotIn("DELL", data)
+        self.assertEqual([entry[ID_FIELD] for entry in data["HP"]], ["a", "b", "c"])
+        self.assertEqual(data["HP"][2]["Model"], "7050")
+        self.assertEqual(index, record_index(data))
+
+    def test_unknown_ids_are_skipped(self):
+        data = database()
+        self.assertEqual(merge_records(data, {"missing": ("HP", {"Image": "DONE"})}), 0)
+        self.assertEqual(data, database())
+
+
+class RemoveRecordsTest(unittest.TestCase):
+    def test_records_of_several_brands_are_removed(self):
+        data = database()
+        index = record_index(data)
+        self.assertEqual(remove_records(data, ["a", "c", "c", "missing"], index), 2)
+        self.assertEqual(data, {"HP": [database()["HP"][1]]})
+        self.assertEqual(index, record_index(data))
+
+    def test_moved_record_is_removed_from_its_new_brand(self):
+        data = database()
+        index = record_index(data)
+        merge_records(data, {"a": ("DELL", {})}, index)
+        self.assertEqual(remove_records(data, ["a"], index), 1)
+        self.assertEqual([entry[ID_FIELD] for entry in data["DELL"]], ["c"])
+        self.assertEqual([entry[ID_FIELD] for entry in data["HP"]], ["b"])
+        self.assertEqual(index, record_index(data))
+
+
+class FindRecordTest(unittest.TestCase):
+    def test_match_ignores_case_and_surrounding_spaces(self):
+        brand, entry = find_record(database(), " hp", "840 g3 ", "laptop")
+        self.assertEqual((brand, entry[ID_FIELD]), ("HP", "a"))
+
+    def test_excluded_record_is_skipped(self):
+        data = database()
+        data["HP"].append(dict(data["HP"][0], **{ID_FIELD: "d"}))
+        self.assertEqual(find_record(data, "HP", "840 G3", "LAPTOP", exclude_id="a")[1][ID_FIELD], "d")
+        self.assertIsNone(find_record(database(), "HP", "840 G3", "LAPTOP", exclude_id="a"))
+
+    def test_brand_keeps_the_spelling_in_the_database(self):
+        self.assertEqual(brand_spelling(database(), " dell "), "DELL")
+        self.assertEqual(brand_spelling(database(), "Lenovo"), "Lenovo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from model.search_index import SearchIndex
+
+
+ROWS = {
+    1: ("HP", "EliteDesk 800 G3", "Mini"),
+    2: ("Dell", "OptiPlex 7040", "SFF"),
+    3: ("Lenovo", "ThinkPad T480", "Laptop"),
+    # Holds the trigrams of "abcd" without the word itself
+    4: ("abcxbcd", "", ""),
+}
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.rebuild(ROWS.items())
+
+    def test_every_word_must_match_in_any_order(self):
+        self.assertEqual(self.index.search("mini hp"), {1})
+        self.assertEqual(self.index.search("hp laptop"), set())
+
+    def test_three_letter_words_match_through_trigrams(self):
+        self.assertEqual(self.index.search("sff"), {2})
+        self.assertEqual(self.index.search("SFF"), {2})
+
+    def test_short_words_are_checked_against_the_row_text(self):
+        self.assertEqual(self.index.search("g3"), {1})
+        self.assertEqual(self.index.search("p"), {1, 2, 3})
+        self.assertEqual(self.index.search("zz"), set())
+
+    def test_long_words_are_verified_after_the_trigrams(self):
+        self.assertEqual(self.index.search("abcd"), set())
+        self.assertEqual(self.index.search("bcd"), {4})
+        self.assertEqual(self.index.search("7040"), {2})
+
+    def test_empty_text_matches_every_row(self):
+        self.assertEqual(self.index.search("  "), set(ROWS))
+
+    def test_candidates_limit_the_result(self):
+        self.assertEqual(self.index.search("p", candidates={2, 3, 99}), {2, 3})
+
+    def test_update_and_remove(self):
+        self.index.update(2, ("Dell", "Latitude 5490", "Laptop"))
+        self.index.remove(3)
+        self.assertEqual(self.index.search("laptop"), {2})
+        self.assertEqual(self.index.search("optiplex"), set())
+        self.assertEqual(len(self.index), 3)
+
+    def test_snapshot_is_not_changed_by_later_edits(self):
+        version = self.index.version
+        snapshot = self.index.snapshot()
+        self.index.update(1, ("HP", "ProBook 450", "Laptop"))
+        self.index.add(5, ("HP", "EliteBook 840", "Laptop"))
+        self.index.remove(2)
+
+        self.assertEqual(snapshot.search("hp"), {1})
+        self.assertEqual(snapshot.search("elitedesk"), {1})
+        self.assertEqual(snapshot.search("optiplex"), {2})
+        self.assertEqual(snapshot.search("laptop"), {3})
+        self.assertEqual(snapshot.version, version)
+
+        self.assertEqual(self.index.search("hp"), {1, 5})
+        self.assertEqual(self.index.search("elitedesk"), set())
+        self.assertEqual(self.index.search("laptop"), {1, 3, 5})
+        self.assertGreater(self.index.version, version)
+
+    def test_snapshot_survives_a_rebuild(self):
+        snapshot = self.index.snapshot()
+        self.index.rebuild([(10, ("Fujitsu", "Esprimo", "Tower"))])
+        self.assertEqual(snapshot.search("thinkpad"), {3})
+        self.assertEqual(self.index.search("thinkpad"), set())
+        self.assertEqual(self.index.search("esprimo"), {10})
+
+    def test_every_snapshot_keeps_its_own_contents(self):
+        first = self.index.snapshot()
+        self.index.add(5, ("HP", "EliteBook 840", "Laptop"))
+        second = self.index.snapshot()
+        self.index.remove(5)
+        self.assertEqual(first.search("elitebook"), set())
+        self.assertEqual(second.search("elitebook"), {5})
+        self.assertEqual(self.index.search("elitebook"), set())
+
+
+if __name__ == "__main__":
+    unittest.main()